@@ -0,0 +1,147 @@
+"""Anytime Repairing A* (ARA*) on a Gridworld.
+
+ARA* first runs a weighted A*, ordering the open list by g + w * h with an inflated weight w, which
+finds a path quickly but only guarantees its cost is at most w times the optimum. It then lowers
+w and searches again, reusing the g-values of the previous iterations: only the cells whose
+g-value improved after they were expanded (kept in an INCONS list) are reopened. Every iteration
+tightens the bound, and the search can be stopped at any moment with the best path found so far.
+
+https://papers.nips.cc/paper/2382-ara-anytime-a-with-provable-bounds-on-sub-optimality
+"""
+
+from __future__ import annotations
+
+import heapq
+import time
+from itertools import count
+
+from astar.astar import NEIGHBOUR_OFFSETS, Cell, Gridworld
+
+TPosition = tuple[int, int]
+
+INF = float("inf")
+
+
+def ara_star(world, start, goal, time_limit=None, weight=3.0, weight_step=0.5):
+    """
+    Anytime weighted A* with the same call shape as astar().
+    world       : Object of the world object, non-zero cells of world.w are obstacles.
+    start       : Object of the cell as  start position.
+    stop        : Object of the cell as goal position.
+    time_limit  : Wall-clock budget in seconds, None to run until the path is optimal.
+    weight      : Initial heuristic inflation, at least 1.
+    weight_step : How much the inflation is lowered after every solution.
+
+    Returns the best path found within the budget and its suboptimality bound: its cost is at
+    most bound times the optimal cost. Without any solution the path only holds the start and the
+    bound is infinite.
+
+    >>> p = Gridworld((10, 10))
+    >>> p.w[1:9, 5] = 1
+    >>> start = Cell()
+    >>> start.position = (5, 0)
+    >>> goal = Cell()
+    >>> goal.position = (5, 9)
+    >>> path, bound = ara_star(p, start, goal)
+    >>> len(path), bound
+    (10, 1.0)
+    >>> ara_star(p, start, goal, time_limit=0)
+    ([(5, 0)], inf)
+    """
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    start_position = start.position
+    goal_position = goal.position
+    heuristic = world.heuristic
+    g = {start_position: 0}
+    parent: dict[TPosition, TPosition | None] = {start_position: None}
+    closed: set[TPosition] = set()
+    incons: set[TPosition] = set()
+    open_set = {start_position}
+    _open: list[tuple[float, int, TPosition]] = []
+    counter = count()
+
+    def fvalue(position):
+        return g[position] + weight * heuristic(position, goal_position)
+
+    def rebuild_open():
+        _open[:] = [(fvalue(s), next(counter), s) for s in open_set]
+        heapq.heapify(_open)
+
+    def improve_path():
+        """Weighted A* until the goal can not be improved, False if the deadline passed."""
+        while _open:
+            f, _, position = _open[0]
+            if position not in open_set or f != fvalue(position):
+                heapq.heappop(_open)
+                continue
+            if g.get(goal_position, INF) <= f:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            heapq.heappop(_open)
+            open_set.discard(position)
+            closed.add(position)
+            x, y = position
+            for dx, dy in NEIGHBOUR_OFFSETS:
+                n = (x + dx, y + dy)
+                if not (0 <= n[0] < world.world_x_limit and 0 <= n[1] < world.world_y_limit):
+                    continue
+                if world.w[n]:
+                    continue
+                new_g = g[position] + world.step_cost(position, n)
+                if new_g >= g.get(n, INF):
+                    continue
+                g[n] = new_g
+                parent[n] = position
+                if n in closed:
+                    incons.add(n)
+                else:
+                    open_set.add(n)
+                    heapq.heappush(_open, (fvalue(n), next(counter), n))
+        return True
+
+    def retrace():
+        path = []
+        position = goal_position
+        while position is not None:
+            path.append(position)
+            position = parent[position]
+        return path[::-1]
+
+    best_path = [start_position]
+    best_bound = INF
+    rebuild_open()
+    while True:
+        finished = improve_path()
+        if g.get(goal_position, INF) < INF:
+            lower_bound = min(
+                (g[s] + heuristic(s, goal_position) for s in open_set | incons),
+                default=g[goal_position],
+            )
+            bound = g[goal_position] / lower_bound if lower_bound else 1.0
+            if finished:
+                # a completed weighted search also guarantees the weight itself
+                bound = min(bound, weight)
+            if bound <= best_bound:
+                best_path = retrace()
+                best_bound = bound
+        if not finished or best_bound <= 1 or weight <= 1:
+            return best_path, best_bound
+        weight = max(1.0, weight - weight_step)
+        open_set |= incons
+        incons.clear()
+        closed.clear()
+        rebuild_open()
+
+
+if __name__ == "__main__":
+    world = Gridworld((200, 200))
+    world.w[20:180, 100] = 1
+    world.w[100, 20:180] = 1
+    start = Cell()
+    start.position = (150, 150)
+    goal = Cell()
+    goal.position = (10, 10)
+    for budget in (0.001, 0.01, 0.1, None):
+        path, bound = ara_star(world, start, goal, time_limit=budget)
+        print(f"time limit {budget}: path of {len(path)} cells, at most {bound:f} x optimal")
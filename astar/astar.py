@@ -12,8 +12,16 @@ algorithm with brains.
 https://en.wikipedia.org/wiki/A*_search_algorithm
 """
 
+import heapq
+from itertools import count
+from math import sqrt
+
 import numpy as np
 
+# Every state of every Gridworld and BitGrid gets its own version, so versions can key shared
+# caches.
+_versions = count()
+
 
 class Cell:
     """
@@ -42,39 +50,146 @@ class Cell:
         print(self.position)
 
 
+def cell_at(position):
+    """A Cell at the given position, as astar() and astar_grid() take their start and goal.
+
+    >>> cell_at((2, 3)).position
+    (2, 3)
+    """
+    cell = Cell()
+    cell.position = position
+    return cell
+
+
+SQRT2 = sqrt(2)
+
+
+def octile_distance(a, b):
+    """Cost of the cheapest eight-way path between a and b on an open grid of unit cells."""
+    dx = abs(a[0] - b[0])
+    dy = abs(a[1] - b[1])
+    return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+
+
+# (dx, dy) offsets of the eight cells surrounding a position.
+NEIGHBOUR_OFFSETS = (
+    (-1, -1),
+    (-1, 0),
+    (-1, 1),
+    (0, -1),
+    (0, 1),
+    (1, -1),
+    (1, 0),
+    (1, 1),
+)
+
+
 class Gridworld:
     """Gridworld class represents the  external world here a grid M*M matrix.
 
     world_size: create a numpy array with the given world_size default is 5.
+    w: optional existing array to use as the world, any non-zero cell is an obstacle.
+    heuristic: optional admissible function of two positions, such as a LandmarkHeuristic,
+    replacing the default heuristic of the searchers working on this world.
+    costs: optional array of positive traversal costs per cell. A move between two neighbouring
+    cells costs the mean of their costs, times sqrt(2) when it is diagonal, so moves cost the
+    same both ways. Without it every cell costs 1 and no array is kept until update_costs.
+
+    >>> world = Gridworld(w=[[0, 1], [0, 0]])
+    >>> world.world_x_limit, world.world_y_limit
+    (2, 2)
+    >>> world.is_blocked((0, 1))
+    True
+    >>> world = Gridworld((2, 2), costs=[[1, 4], [2, 2]])
+    >>> world.step_cost((0, 0), (0, 1)), world.step_cost((0, 1), (1, 0)) == 3 * SQRT2
+    (2.5, True)
+    >>> world.heuristic((0, 0), (1, 1)) == SQRT2
+    True
+    >>> world.update_costs([(0, 0), (1, 0), (1, 1)], 4)
+    >>> world.uniform_costs, world.min_cost
+    (True, 1.0)
+    >>> world.update_costs([(0, 0)], 0)
+    Traceback (most recent call last):
+    ...
+    ValueError: costs must be positive
     """
 
-    def __init__(self, world_size=(5, 5)):
-        self.w = np.zeros(world_size)
-        self.world_x_limit = world_size[0]
-        self.world_y_limit = world_size[1]
+    def __init__(self, world_size=(5, 5), w=None, heuristic=None, costs=None):
+        self.w = np.zeros(world_size) if w is None else np.asarray(w)
+        if heuristic is not None:
+            self.heuristic = heuristic
+        # None while every cell costs 1, so uniform worlds take no memory for costs
+        self.costs = None if costs is None else np.array(costs, dtype=float)
+        if self.costs is not None and (
+            self.costs.shape != self.w.shape or not (self.costs > 0).all()
+        ):
+            raise ValueError("costs must be positive and shaped like the world")
+        # Scales the heuristic so it never overestimates, even through the cheapest cells.
+        self.min_cost = 1.0 if self.costs is None else float(self.costs.min())
+        self.world_x_limit = self.w.shape[0]
+        self.world_y_limit = self.w.shape[1]
+        self.version = next(_versions)
+        self.caches = []
 
     def show(self):
         print(self.w)
 
+    def is_blocked(self, position):
+        return bool(self.w[position])
+
+    def update_cells(self, cells, value=1):
+        """Set the given cells of w to value and let the attached path caches know.
+
+        Writing to w directly does not change the version, so cached paths would not be
+        invalidated.
+        """
+        cells = list(cells)
+        for cell in cells:
+            self.w[cell] = value
+        old_version, self.version = self.version, next(_versions)
+        for cache in self.caches:
+            cache.cells_changed(old_version, self.version, cells, blocked=bool(value))
+
+    def update_costs(self, cells, cost):
+        """Set the traversal cost of the given cells and let the attached path caches know."""
+        if not cost > 0:
+            raise ValueError("costs must be positive")
+        if self.costs is None:
+            self.costs = np.ones(self.w.shape)
+        cells = list(cells)
+        raised = True
+        for cell in cells:
+            raised = raised and cost >= self.costs[cell]
+            self.costs[cell] = cost
+        # Only ever lowered, the heuristic stays admissible for searches already running.
+        self.min_cost = min(self.min_cost, float(cost))
+        old_version, self.version = self.version, next(_versions)
+        for cache in self.caches:
+            cache.cells_changed(old_version, self.version, cells, blocked=bool(raised))
+
+    @property
+    def uniform_costs(self):
+        """Whether every cell costs the same, as Jump Point Search requires."""
+        return self.costs is None or bool(self.costs.min() == self.costs.max())
+
+    def step_cost(self, a, b):
+        """Cost of moving from position a to the neighbouring position b."""
+        cost = 1.0 if self.costs is None else (self.costs[a] + self.costs[b]) / 2
+        return float(cost * SQRT2 if a[0] != b[0] and a[1] != b[1] else cost)
+
+    def heuristic(self, a, b):
+        """Admissible estimate of the cost between positions a and b."""
+        return self.min_cost * octile_distance(a, b)
+
     def get_neighbours(self, cell):
-        """Return the neighbours of cell."""
-        neughbour_cord = [
-            (-1, -1),
-            (-1, 0),
-            (-1, 1),
-            (0, -1),
-            (0, 1),
-            (1, -1),
-            (1, 0),
-            (1, 1),
-        ]
+        """Return the free neighbours of cell."""
         current_x = cell.position[0]
         current_y = cell.position[1]
         neighbours = []
-        for n in neughbour_cord:
+        for n in NEIGHBOUR_OFFSETS:
             x = current_x + n[0]
             y = current_y + n[1]
-            if 0 <= x < self.world_x_limit and 0 <= y < self.world_y_limit:
+            if 0 <= x < self.world_x_limit and 0 <= y < self.world_y_limit and not self.w[x, y]:
                 c = Cell()
                 c.position = (x, y)
                 c.parent = cell
@@ -82,12 +197,18 @@ class Gridworld:
         return neighbours
 
 
-def astar(world, start, goal):
+def astar(world, start, goal, cache=None, heuristic=None, hooks=None):
     """
     Implementation of a start algorithm.
-    world : Object of the world object.
-    start : Object of the cell as  start position.
-    stop  : Object of the cell as goal position.
+    world     : Object of the world object.
+    start     : Object of the cell as  start position.
+    stop      : Object of the cell as goal position.
+    cache     : Optional PathCache, it is attached to the world so cell updates invalidate it.
+    heuristic : Optional function of two positions replacing world.heuristic.
+    hooks     : Optional SearchHooks, such as a SearchStats, told about the search as it runs.
+
+    The open list is a binary heap with lazy deletion and the closed list is a set of positions,
+    so every cell is expanded at most once.
 
     >>> p = Gridworld()
     >>> start = Cell()
@@ -96,36 +217,170 @@ def astar(world, start, goal):
     >>> goal.position = (4,4)
     >>> astar(p, start, goal)
     [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)]
+    >>> goal.position = (999, 500)
+    >>> len(astar(Gridworld((1000, 1000)), start, goal))
+    1000
+
+    >>> from astar.path_cache import PathCache
+    >>> cache = PathCache()
+    >>> goal.position = (4, 4)
+    >>> astar(p, start, goal, cache) == astar(p, start, goal, cache)
+    True
+    >>> p.update_cells([(2, 2)])
+    >>> astar(p, start, goal, cache)
+    [(0, 0), (1, 1), (1, 2), (2, 3), (3, 4), (4, 4)]
+    >>> cache.hits, cache.misses
+    (1, 2)
     """
-    _open = []
-    _closed = []
-    _open.append(start)
+    if cache is not None:
+        if cache not in world.caches:
+            world.caches.append(cache)
+        path = cache.lookup(world.version, start.position, goal.position, heuristic)
+        if path is None:
+            path = astar(world, start, goal, heuristic=heuristic, hooks=hooks)
+            cache.store(world.version, start.position, goal.position, path, heuristic)
+        elif hooks is not None:
+            hooks.on_finish(path)
+        return path
+
+    if heuristic is None:
+        heuristic = world.heuristic
+    # Ties on f go to the deeper cell, on open ground every cell between start and goal would
+    # otherwise be expanded before the goal. f is rounded as sums of diagonal steps that are
+    # equal can differ in their last bits.
+    _open = [(round(start.f, 6), -start.g, 0, start)]
+    # Best g found so far per position; stale heap entries are skipped on pop.
+    _best_g = {start.position: start.g}
+    _closed = set()
+    counter = 1
+    if hooks is not None:
+        hooks.on_phase("search")
+        hooks.on_push(start.position, 1)
 
     while _open:
-        min_f = np.argmin([n.f for n in _open])
-        current = _open[min_f]
-        _closed.append(_open.pop(min_f))
+        *_, current = heapq.heappop(_open)
+        if current.position in _closed:
+            continue
+        _closed.add(current.position)
         if current == goal:
             break
+        if hooks is not None:
+            hooks.on_expand(current.position)
         for n in world.get_neighbours(current):
-            for c in _closed:
-                if c == n:
-                    continue
-            n.g = current.g + 1
-            x1, y1 = n.position
-            x2, y2 = goal.position
-            n.h = (y2 - y1) ** 2 + (x2 - x1) ** 2
+            if n.position in _closed:
+                continue
+            n.g = current.g + world.step_cost(current.position, n.position)
+            if n.g >= _best_g.get(n.position, float("inf")):
+                continue
+            n.h = heuristic(n.position, goal.position)
             n.f = n.h + n.g
-
-            for c in _open:
-                if c == n and c.f < n.f:
-                    continue
-            _open.append(n)
+            _best_g[n.position] = n.g
+            heapq.heappush(_open, (round(n.f, 6), -n.g, counter, n))
+            counter += 1
+            if hooks is not None:
+                hooks.on_heuristic(n.position)
+                hooks.on_push(n.position, len(_open))
+    else:
+        if hooks is not None:
+            hooks.on_finish([start.position])
+        return [start.position]
+    if hooks is not None:
+        hooks.on_goal(current.position)
+        hooks.on_phase("retrace")
     path = []
     while current.parent is not None:
         path.append(current.position)
         current = current.parent
     path.append(current.position)
+    path.reverse()
+    if hooks is not None:
+        hooks.on_finish(path)
+    return path
+
+
+def astar_grid(world, start, goal):
+    """
+    Array-backed variant of astar() for large worlds.
+    world : Object of the world object, non-zero cells of world.w are obstacles.
+    start : Object of the cell as  start position.
+    stop  : Object of the cell as goal position.
+
+    Cells are addressed by their flat id x * world_y_limit + y and the search state (g-scores,
+    parents and open/closed flags) lives in preallocated NumPy arrays, so no Cell object is built
+    per expansion. If the goal can not be reached only the start position is returned.
+
+    >>> p = Gridworld()
+    >>> p.w[1:4, 2] = 1
+    >>> start = Cell()
+    >>> start.position = (2, 0)
+    >>> goal = Cell()
+    >>> goal.position = (2, 4)
+    >>> astar_grid(p, start, goal)
+    [(2, 0), (1, 1), (0, 2), (1, 3), (2, 4)]
+    >>> p.w[0, 2] = p.w[4, 2] = 1
+    >>> astar_grid(p, start, goal)
+    [(2, 0)]
+    """
+    heuristic = world.heuristic
+    rows, cols = world.world_x_limit, world.world_y_limit
+    size = rows * cols
+    index_type = np.int32 if size < 2**31 else np.int64
+    blocked = np.ravel(world.w != 0)
+    # only the costs of the cells reached are read, through a memoryview of the array
+    costs = None if world.costs is None else np.ascontiguousarray(world.costs).ravel().data
+    g = np.full(size, np.inf)
+    parent = np.full(size, -1, dtype=index_type)
+    # 0: unseen, 1: open, 2: closed
+    state = np.zeros(size, dtype=np.uint8)
+    offsets = [
+        (dx, dy, dx * cols + dy, SQRT2 if dx and dy else 1.0) for dx, dy in NEIGHBOUR_OFFSETS
+    ]
+
+    start_id = start.position[0] * cols + start.position[1]
+    goal_id = goal.position[0] * cols + goal.position[1]
+    goal_position = goal.position
+    g[start_id] = 0
+    state[start_id] = 1
+    # Ties are broken as in astar().
+    _open = [(round(heuristic(start.position, goal_position), 6), 0.0, start_id)]
+
+    while _open:
+        _, _, current = heapq.heappop(_open)
+        if state[current] == 2:
+            continue
+        state[current] = 2
+        if current == goal_id:
+            break
+        x, y = divmod(current, cols)
+        current_g = g[current]
+        current_cost = 1.0 if costs is None else costs[current]
+        for dx, dy, delta, length in offsets:
+            nx = x + dx
+            ny = y + dy
+            if not (0 <= nx < rows and 0 <= ny < cols):
+                continue
+            n = current + delta
+            if blocked[n] or state[n] == 2:
+                continue
+            if costs is None:
+                next_g = current_g + length
+            else:
+                next_g = current_g + length * (current_cost + costs[n]) / 2
+            if next_g >= g[n]:
+                continue
+            g[n] = next_g
+            parent[n] = current
+            state[n] = 1
+            f = round(next_g + heuristic((nx, ny), goal_position), 6)
+            heapq.heappush(_open, (f, -next_g, n))
+    else:
+        return [start.position]
+
+    path = []
+    current = goal_id
+    while current != -1:
+        path.append(divmod(int(current), cols))
+        current = parent[current]
     return path[::-1]
 
 
@@ -0,0 +1,139 @@
+"""Answer many start/goal queries against one grid with a pool of worker processes.
+
+Each worker receives the grid once, when it starts, and then solves the queries handed to it, so
+throughput scales with the number of cores instead of being bound to one interpreter. Passing a
+SharedGrid sends only its handle and the workers attach to the same memory instead. Results are
+streamed back in completion order together with the index of the query they answer.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from collections.abc import Callable, Iterable, Iterator
+from typing import NamedTuple
+
+import numpy as np
+
+from astar import bidirectional_a_star
+from astar.astar import Gridworld, astar, astar_grid, cell_at
+from astar.bitgrid import BitGrid
+from astar.jump_point_search import jump_point_search
+from astar.shared_grid import GridHandle, SharedGrid, attach
+from others.greedy_best_first import GreedyBestFirst
+
+TPosition = tuple[int, int]
+Path = list[TPosition]
+
+
+class QueryResult(NamedTuple):
+    index: int
+    start: TPosition
+    goal: TPosition
+    path: Path | None
+
+
+def _gridworld_searcher(search: Callable) -> Callable:
+    def make(grid) -> Callable[[TPosition, TPosition], Path]:
+        world = Gridworld(w=grid)
+        return lambda start, goal: search(world, cell_at(start), cell_at(goal))
+
+    return make
+
+
+def _bidirectional_searcher(search_class: type) -> Callable:
+    def make(grid) -> Callable[[TPosition, TPosition], Path]:
+        # one compact copy of the map is shared by every search of the worker
+        blocked = bidirectional_a_star.compact_grid(grid)
+        return lambda start, goal: search_class(start, goal, grid=blocked).search()
+
+    return make
+
+
+def _greedy_best_first(grid) -> Callable[[TPosition, TPosition], Path | None]:
+    return lambda start, goal: GreedyBestFirst(grid, start, goal).search()
+
+
+# Every grid uses 0 for free cells and anything else for obstacles.
+SEARCHERS: dict[str, Callable] = {
+    "astar": _gridworld_searcher(astar),
+    "astar_grid": _gridworld_searcher(astar_grid),
+    "jump_point_search": _gridworld_searcher(jump_point_search),
+    "bidirectional_astar": _bidirectional_searcher(bidirectional_a_star.AStar),
+    "bidirectional": _bidirectional_searcher(bidirectional_a_star.BidirectionalAStar),
+    "greedy_best_first": _greedy_best_first,
+}
+
+_worker_search: Callable[[TPosition, TPosition], Path | None] | None = None
+
+
+def _init_worker(grid, algorithm: str) -> None:
+    global _worker_search
+    if isinstance(grid, GridHandle):
+        grid = attach(grid)
+    _worker_search = SEARCHERS[algorithm](grid)
+
+
+def _solve(query: tuple[int, tuple[TPosition, TPosition]]) -> QueryResult:
+    index, (start, goal) = query
+    assert _worker_search is not None
+    return QueryResult(index, start, goal, _worker_search(start, goal))
+
+
+def batch_search(
+    grid,
+    queries: Iterable[tuple[TPosition, TPosition]],
+    algorithm: str = "astar",
+    processes: int | None = None,
+    chunksize: int = 16,
+) -> Iterator[QueryResult]:
+    """Solve every (start, goal) pair of queries on grid and yield the results as they complete.
+
+    Args:
+        grid: 2D array-like where 0 is a free cell and anything else an obstacle, a BitGrid,
+            which is sent to the workers packed, or a SharedGrid holding either.
+        queries: Iterable of (start, goal) positions. The pool reads all of them up front
+            while dispatching, so a generator is drained at once rather than as results
+            complete.
+        algorithm: Name of the pathfinder to use, one of SEARCHERS.
+        processes: Number of worker processes, defaults to the number of CPUs.
+        chunksize: Number of queries sent to a worker at a time.
+
+    >>> grid = [[0, 0, 0], [1, 1, 0], [0, 0, 0]]
+    >>> queries = [((0, 0), (2, 0)), ((2, 2), (0, 2))]
+    >>> results = batch_search(grid, queries, "greedy_best_first", processes=2)
+    >>> for result in sorted(results):
+    ...     print(result.index, result.path)
+    0 [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 1), (2, 0)]
+    1 [(2, 2), (1, 2), (0, 2)]
+    >>> with SharedGrid(grid) as shared:
+    ...     [result.path for result in batch_search(shared, queries[1:], processes=1)]
+    [[(2, 2), (1, 2), (0, 2)]]
+    >>> packed = BitGrid.from_array(grid)
+    >>> [result.path for result in batch_search(packed, queries[1:], "bidirectional", 1)]
+    [[(2, 2), (1, 2), (0, 2)]]
+    """
+    if algorithm not in SEARCHERS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {sorted(SEARCHERS)}")
+    if isinstance(grid, SharedGrid):
+        grid = grid.handle
+    elif not isinstance(grid, BitGrid):
+        grid = np.asarray(grid)
+    with multiprocessing.Pool(processes, _init_worker, (grid, algorithm)) as pool:
+        yield from pool.imap_unordered(_solve, enumerate(queries), chunksize)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    grid = (rng.random((200, 200)) < 0.2).astype(np.uint8)
+    free = np.argwhere(grid == 0)
+    pairs = [
+        (tuple(map(int, free[i])), tuple(map(int, free[j])))
+        for i, j in rng.integers(0, len(free), size=(200, 2))
+    ]
+
+    with SharedGrid(grid) as shared:
+        start_time = time.time()
+        solved = sum(1 for _ in batch_search(shared, pairs, "astar_grid"))
+        print(f"{solved} queries solved in {time.time() - start_time:f} seconds")
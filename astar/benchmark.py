@@ -0,0 +1,358 @@
+"""Compare the pathfinders of this repository on the same scenarios.
+
+Every scenario is a generated grid (random obstacles, a maze, rooms joined by doors or an open
+field) with start/goal pairs that are known to be connected. Every pathfinder solves every query
+and the run records wall time, the SearchStats counters (expanded nodes, reopened nodes,
+heuristic calls and the peak size of the open list), the path cost, and the peak memory
+allocated during the search. Results are written as JSON, so a later run
+can be compared against a saved one to catch regressions:
+
+    python -m astar.benchmark --out baseline.json
+    python -m astar.benchmark --baseline baseline.json
+
+The pathfinders do not all move alike: astar takes diagonal steps, the others only straight
+ones, as CONNECTIVITY records and every row reports. Path costs are geometric lengths, so costs
+only compare between pathfinders of the same connectivity; with diagonal steps astar solves an
+easier problem and finds shorter paths.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import math
+import platform
+import signal
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Iterator
+from typing import NamedTuple
+
+import numpy as np
+
+from astar import bidirectional_a_star, multi_heuristic_astar
+from astar.astar import Gridworld, astar, cell_at
+from astar.instrumentation import SearchStats
+from astar.landmarks import distances_from
+from others.greedy_best_first import GreedyBestFirst
+
+TPosition = tuple[int, int]
+Path = list[TPosition]
+
+KINDS = ("random", "maze", "room", "open")
+
+
+class Scenario(NamedTuple):
+    kind: str
+    size: int
+    grid: np.ndarray
+    queries: list[tuple[TPosition, TPosition]]
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def make_grid(kind: str, size: int, seed: int = 0) -> np.ndarray:
+    """Return a size x size uint8 grid of the given kind, 1 marks an obstacle.
+
+    >>> make_grid("maze", 5)
+    array([[0, 1, 0, 0, 0],
+           [0, 1, 0, 1, 0],
+           [0, 1, 0, 1, 0],
+           [0, 1, 1, 1, 0],
+           [0, 0, 0, 0, 0]], dtype=uint8)
+    >>> int(make_grid("room", 9, seed=1).sum())
+    24
+    """
+    rng = np.random.default_rng(seed)
+    if kind == "open":
+        return np.zeros((size, size), dtype=np.uint8)
+    if kind == "random":
+        return (rng.random((size, size)) < 0.25).astype(np.uint8)
+    if kind == "maze":
+        # Depth-first backtracker, cells sit on even coordinates and walls between them.
+        grid = np.ones((size, size), dtype=np.uint8)
+        cells = (size + 1) // 2
+        stack = [(0, 0)]
+        grid[0, 0] = 0
+        while stack:
+            x, y = stack[-1]
+            options = [
+                (x + dx, y + dy)
+                for dx, dy in ((-1, 0), (0, -1), (0, 1), (1, 0))
+                if 0 <= x + dx < cells and 0 <= y + dy < cells and grid[2 * (x + dx), 2 * (y + dy)]
+            ]
+            if not options:
+                stack.pop()
+                continue
+            nx, ny = options[rng.integers(len(options))]
+            grid[x + nx, y + ny] = 0
+            grid[2 * nx, 2 * ny] = 0
+            stack.append((nx, ny))
+        return grid
+    if kind == "room":
+        room = max(4, size // 8)
+        grid = np.zeros((size, size), dtype=np.uint8)
+        grid[room::room, :] = 1
+        grid[:, room::room] = 1
+        # one door in every wall segment between two rooms
+        for wall in range(room, size, room):
+            for begin in range(0, size - 1, room):
+                low, high = (1 if begin else 0), min(room, size - begin)
+                grid[wall, begin + rng.integers(low, high)] = 0
+                grid[begin + rng.integers(low, high), wall] = 0
+        return grid
+    raise ValueError(f"Unknown grid kind {kind!r}, expected one of {KINDS}")
+
+
+def make_queries(grid: np.ndarray, count: int, seed: int = 0) -> list[tuple[TPosition, TPosition]]:
+    """Pick count start/goal pairs connected by straight moves, goals far from their start."""
+    rng = np.random.default_rng(seed)
+    free = np.argwhere(grid == 0)
+    queries: list[tuple[TPosition, TPosition]] = []
+    while len(queries) < count:
+        start = tuple(int(v) for v in free[rng.integers(len(free))])
+        distance = distances_from(grid, start, connectivity=4)
+        farthest = distance[np.isfinite(distance)].max()
+        if farthest == 0:
+            continue
+        reachable = np.argwhere(np.isfinite(distance) & (distance >= farthest / 2))
+        goal = tuple(int(v) for v in reachable[rng.integers(len(reachable))])
+        queries.append((start, goal))
+    return queries
+
+
+def make_scenarios(
+    kinds: Iterable[str] = KINDS, sizes: Iterable[int] = (16, 32), queries: int = 3, seed: int = 0
+) -> list[Scenario]:
+    scenarios = []
+    for kind in kinds:
+        for size in sizes:
+            grid = make_grid(kind, size, seed)
+            scenarios.append(Scenario(kind, size, grid, make_queries(grid, queries, seed)))
+    return scenarios
+
+
+def _run_astar(grid: np.ndarray, start: TPosition, goal: TPosition, hooks=None) -> Path:
+    return astar(Gridworld(w=grid), cell_at(start), cell_at(goal), hooks=hooks)
+
+
+def _run_bidirectional_astar(
+    grid: np.ndarray, start: TPosition, goal: TPosition, hooks=None
+) -> Path:
+    return bidirectional_a_star.AStar(start, goal, hooks=hooks, grid=grid).search()
+
+
+def _run_bidirectional(grid: np.ndarray, start: TPosition, goal: TPosition, hooks=None) -> Path:
+    return bidirectional_a_star.BidirectionalAStar(start, goal, hooks=hooks, grid=grid).search()
+
+
+def _run_multi_a_star(grid: np.ndarray, start: TPosition, goal: TPosition, hooks=None) -> Path:
+    return multi_heuristic_astar.MultiHeuristicAStar(grid).search(start, goal, hooks).path
+
+
+def _run_greedy_best_first(
+    grid: np.ndarray, start: TPosition, goal: TPosition, hooks=None
+) -> Path | None:
+    return GreedyBestFirst(grid.tolist(), start, goal, hooks).search()
+
+
+PATHFINDERS: dict[str, Callable[..., Path | None]] = {
+    "astar": _run_astar,
+    "bidirectional_astar": _run_bidirectional_astar,
+    "bidirectional": _run_bidirectional,
+    "multi_a_star": _run_multi_a_star,
+    "greedy_best_first": _run_greedy_best_first,
+}
+
+# Neighbours every pathfinder moves to, 8 with diagonal steps and 4 without.
+CONNECTIVITY: dict[str, int] = {
+    "astar": 8,
+    "bidirectional_astar": 4,
+    "bidirectional": 4,
+    "multi_a_star": 4,
+    "greedy_best_first": 4,
+}
+
+
+def path_cost(grid: np.ndarray, path: Path | None, goal: TPosition) -> float | None:
+    """Geometric length of path, None unless it is a valid path of free cells to goal.
+
+    >>> grid = np.zeros((3, 3), dtype=np.uint8)
+    >>> path_cost(grid, [(0, 0), (1, 1), (1, 2)], (1, 2)) == 1 + math.sqrt(2)
+    True
+    >>> path_cost(grid, [(0, 0), (2, 2)], (2, 2)) is None
+    True
+    """
+    if not path or path[-1] != goal:
+        return None
+    cost = 0.0
+    for (x1, y1), (x2, y2) in zip(path, path[1:]):
+        if grid[x2, y2] or max(abs(x2 - x1), abs(y2 - y1)) != 1:
+            return None
+        cost += math.sqrt(2) if x1 != x2 and y1 != y2 else 1
+    return cost
+
+
+@contextlib.contextmanager
+def _time_limit(seconds: float | None):
+    """Raise SearchTimeout when the block runs longer than seconds, where SIGALRM exists."""
+    if seconds is None or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def interrupt(signum, frame):
+        raise SearchTimeout
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_benchmark(
+    scenarios: Iterable[Scenario],
+    algorithms: Iterable[str] = tuple(PATHFINDERS),
+    repeat: int = 3,
+    time_limit: float | None = 2.0,
+) -> Iterator[dict]:
+    """Solve every query with every algorithm and yield one record per run.
+
+    time is the best of repeat runs. memory is the peak of a separate run traced with
+    tracemalloc and the counters come from one more run with SearchStats hooks, so neither slows
+    down the timed runs. A search running longer than time_limit is abandoned and recorded with
+    timeout set.
+    """
+    for scenario in scenarios:
+        for index, (start, goal) in enumerate(scenario.queries):
+            for algorithm in algorithms:
+                pathfinder = PATHFINDERS[algorithm]
+                record = {
+                    "kind": scenario.kind,
+                    "size": scenario.size,
+                    "query": index,
+                    "start": start,
+                    "goal": goal,
+                    "algorithm": algorithm,
+                    "connectivity": CONNECTIVITY[algorithm],
+                    "timeout": False,
+                }
+                try:
+                    timings = []
+                    for _ in range(repeat):
+                        with _time_limit(time_limit):
+                            start_time = time.perf_counter()
+                            path = pathfinder(scenario.grid, start, goal)
+                            timings.append(time.perf_counter() - start_time)
+                    tracemalloc.start()
+                    with _time_limit(time_limit):
+                        pathfinder(scenario.grid, start, goal)
+                    memory = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    stats = SearchStats()
+                    with _time_limit(time_limit):
+                        pathfinder(scenario.grid, start, goal, hooks=stats)
+                except SearchTimeout:
+                    record.update(timeout=True, found=False)
+                finally:
+                    tracemalloc.stop()
+                if record["timeout"]:
+                    yield record
+                    continue
+                cost = path_cost(scenario.grid, path, goal)
+                record.update(
+                    found=cost is not None,
+                    time=min(timings),
+                    expanded=stats.expanded,
+                    reopened=stats.reopened,
+                    heuristic_calls=stats.heuristic_calls,
+                    open_peak=stats.open_peak,
+                    cost=cost,
+                    memory=memory,
+                )
+                yield record
+
+
+def compare(baseline: list[dict], records: list[dict], tolerance: float = 0.25) -> list[str]:
+    """List the regressions of records against baseline.
+
+    A run regresses when it no longer finds its path, finds a longer one, or its time, expanded
+    nodes, open list or memory grow by more than tolerance.
+
+    >>> old = [{"kind": "open", "size": 8, "query": 0, "algorithm": "astar", "found": True,
+    ...         "time": 0.1, "cost": 7.0, "expanded": 10}]
+    >>> new = [dict(old[0], time=0.2, expanded=11)]
+    >>> compare(old, new)
+    ['open 8 query 0 astar: time 0.1 -> 0.2']
+    """
+
+    def identity(record: dict) -> tuple:
+        return record["kind"], record["size"], record["query"], record["algorithm"]
+
+    previous = {identity(record): record for record in baseline}
+    regressions = []
+    for record in records:
+        old = previous.get(identity(record))
+        if old is None or not old.get("found"):
+            continue
+        name = "{} {} query {} {}".format(*identity(record))
+        if not record.get("found"):
+            regressions.append(f"{name}: no longer finds a path")
+            continue
+        if record["cost"] > old["cost"] + 1e-9:
+            regressions.append(f"{name}: cost {old['cost']:g} -> {record['cost']:g}")
+        for field in ("time", "expanded", "open_peak", "memory"):
+            if old.get(field) and record.get(field) is not None:
+                if record[field] > old[field] * (1 + tolerance):
+                    regressions.append(f"{name}: {field} {old[field]:g} -> {record[field]:g}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kinds", nargs="+", default=list(KINDS), choices=KINDS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[16, 32])
+    parser.add_argument("--queries", type=int, default=3)
+    parser.add_argument("--algorithms", nargs="+", default=list(PATHFINDERS), choices=PATHFINDERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    scenarios = make_scenarios(args.kinds, args.sizes, args.queries, args.seed)
+    records = []
+    for record in run_benchmark(scenarios, args.algorithms, args.repeat, args.time_limit):
+        records.append(record)
+        if record["timeout"]:
+            result = "timeout"
+        else:
+            result = f"{record['time'] * 1000:9.3f} ms  expanded {record['expanded']}"
+            result += f"  cost {record['cost']:g}" if record["found"] else "  no path"
+        name = f"{record['kind']:>6} {record['size']:>4} #{record['query']}"
+        algorithm = f"{record['algorithm']} ({record['connectivity']})"
+        print(f"{name} {algorithm:<24} {result}")
+
+    if args.out:
+        with open(args.out, "w") as file:
+            meta = {"python": platform.python_version(), "numpy": np.__version__}
+            json.dump({"meta": meta, "results": records}, file, indent=1)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(json.load(file)["results"], records, args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""Obstacle grids packed into one bit per cell.
+
+A BitGrid stores every row as whole bytes of np.packbits output, so a 100000 x 100000 map takes
+1.25 GB instead of 10 GB as a uint8 array or 80 GB as float64. It answers the lookups the
+searchers make: grid[y][x] and grid[y, x] give True for an obstacle, len(grid), len(grid[0])
+and grid.shape give the size. BidirectionalAStar and AStar of bidirectional_a_star search it
+without unpacking, so does GreedyBestFirst, and np.asarray(grid) unpacks it for the searchers
+that work on arrays.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+
+from astar.astar import _versions
+
+TPosition = tuple[int, int]
+
+
+class BitGrid:
+    """
+    >>> grid = BitGrid.from_array([[0, 1, 0], [0, 0, 1]])
+    >>> grid.shape, len(grid), len(grid[0]), grid.nbytes
+    ((2, 3), 2, 3, 2)
+    >>> grid[0][1], grid[1, 2], grid[1, 0]
+    (True, True, False)
+    >>> grid.row(1).tolist()
+    [False, False, True]
+    >>> grid.free_neighbours((1, 1), [(-1, 0), (0, -1), (1, 0), (0, 1)])
+    [(1, 0)]
+    >>> grid[0, 0] = 1
+    >>> np.asarray(grid).astype(int).tolist()
+    [[1, 1, 0], [0, 0, 1]]
+    >>> import pickle
+    >>> np.asarray(pickle.loads(pickle.dumps(grid))).astype(int).tolist()
+    [[1, 1, 0], [0, 0, 1]]
+
+    The searchers of bidirectional_a_star and GreedyBestFirst take it as their grid:
+
+    >>> from astar.bidirectional_a_star import AStar
+    >>> from others.greedy_best_first import GreedyBestFirst
+    >>> grid = BitGrid.from_array([[0, 0, 0], [1, 1, 0], [0, 0, 0]])
+    >>> AStar((0, 0), (2, 0), grid=grid).search()
+    [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 1), (2, 0)]
+    >>> GreedyBestFirst(grid, (2, 0), (2, 2)).search()
+    [(2, 0), (2, 1), (2, 2)]
+    """
+
+    def __init__(self, shape: tuple[int, int], bits: np.ndarray | None = None) -> None:
+        """An open grid of the given (rows, columns) shape, or the grid packed in bits.
+
+        bits holds one row of (columns + 7) // 8 bytes per grid row, most significant bit
+        first, and may be a memory-mapped array. version changes with every grid[y, x] = value,
+        not with writes to bits.
+        """
+        rows, columns = shape
+        row_bytes = (columns + 7) // 8
+        if bits is None:
+            bits = np.zeros((rows, row_bytes), dtype=np.uint8)
+        if bits.shape != (rows, row_bytes) or bits.dtype != np.uint8:
+            raise ValueError(f"bits must be a uint8 array of shape {(rows, row_bytes)}")
+        self.bits = np.ascontiguousarray(bits)
+        self.shape = (rows, columns)
+        self._row_bytes = row_bytes
+        self._bytes = memoryview(self.bits.reshape(-1))
+        self.version = next(_versions)
+
+    @classmethod
+    def from_array(cls, grid, chunk_rows: int = 4096) -> BitGrid:
+        """Pack grid, where non-zero cells are obstacles.
+
+        Rows are packed chunk_rows at a time, so a memory-mapped grid is never unpacked in
+        memory as a whole.
+        """
+        if not isinstance(grid, np.ndarray):
+            grid = np.asarray(grid)
+        rows, columns = grid.shape
+        packed = cls((rows, columns))
+        for top in range(0, rows, chunk_rows):
+            bottom = top + chunk_rows
+            packed.bits[top:bottom] = np.packbits(np.asarray(grid[top:bottom]) != 0, axis=1)
+        return packed
+
+    @property
+    def size(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        """grid[y, x] is whether (y, x) is blocked, grid[y] a row supporting [x] and len.
+
+        Positions are not bounds checked, as with nested lists the caller does that.
+        """
+        if isinstance(key, tuple):
+            y, x = key
+            return bool(self._bytes[y * self._row_bytes + (x >> 3)] >> (7 - (x & 7)) & 1)
+        return _BitRow(self, key)
+
+    def __setitem__(self, position: TPosition, value) -> None:
+        y, x = position
+        mask = 0x80 >> (x & 7)
+        if value:
+            self.bits[y, x >> 3] |= mask
+        else:
+            self.bits[y, x >> 3] &= ~mask & 0xFF
+        self.version = next(_versions)
+
+    def __reduce__(self) -> tuple:
+        # the memoryview over bits can not be pickled, an unpickled grid builds its own
+        return (BitGrid, (self.shape, self.bits))
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        grid = np.unpackbits(self.bits, axis=1, count=self.shape[1]).astype(bool)
+        return grid if dtype is None else grid.astype(dtype)
+
+    def row(self, y: int) -> np.ndarray:
+        """Row y unpacked into a bool array, True marks an obstacle."""
+        return np.unpackbits(self.bits[y], count=self.shape[1]).astype(bool)
+
+    def free_neighbours(
+        self, position: TPosition, offsets: Iterable[tuple[int, int]]
+    ) -> list[TPosition]:
+        """The free cells inside the grid at the given (dy, dx) offsets from position."""
+        rows, columns = self.shape
+        y, x = position
+        neighbours = []
+        for dy, dx in offsets:
+            ny, nx = y + dy, x + dx
+            if 0 <= ny < rows and 0 <= nx < columns and not self[ny, nx]:
+                neighbours.append((ny, nx))
+        return neighbours
+
+
+class _BitRow:
+    """Row y of a BitGrid, for code that indexes grids as grid[y][x]."""
+
+    def __init__(self, grid: BitGrid, y: int) -> None:
+        self.grid = grid
+        self.y = y
+
+    def __len__(self) -> int:
+        return self.grid.shape[1]
+
+    def __getitem__(self, x: int) -> bool:
+        return self.grid[self.y, x]
@@ -0,0 +1,167 @@
+"""D* Lite incremental replanning on a Gridworld.
+
+D* Lite searches backwards from the goal to the agent and keeps its search state between queries:
+for every cell a g-value (the last computed goal distance) and an rhs-value (the one-step
+lookahead computed from the neighbours' g-values), plus the priority queue of inconsistent cells
+whose g and rhs differ. When cells change only the cells around them become inconsistent, so
+replanning repairs the affected part of the search instead of starting over, and the agent can
+move along the path between updates.
+
+http://idm-lab.org/bib/abstracts/papers/aaai02b.pdf
+"""
+
+from __future__ import annotations
+
+import heapq
+
+from astar.astar import NEIGHBOUR_OFFSETS, Gridworld
+
+TPosition = tuple[int, int]
+TKey = tuple[float, float]
+
+INF = float("inf")
+
+
+class DStarLite:
+    """
+    >>> world = Gridworld()
+    >>> planner = DStarLite(world, (0, 0), (4, 4))
+    >>> planner.path()
+    [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)]
+    >>> planner.update_cells([(2, 2), (3, 3)])
+    >>> path = planner.path()
+    >>> len(path), (2, 2) in path or (3, 3) in path
+    (6, False)
+    >>> planner.move_to(path[1])
+    >>> planner.path() == path[1:]
+    True
+    """
+
+    def __init__(self, world: Gridworld, start: TPosition, goal: TPosition) -> None:
+        self.world = world
+        self.start = start
+        self.goal = goal
+        self.g: dict[TPosition, float] = {}
+        self.rhs: dict[TPosition, float] = {goal: 0}
+        self.km = 0.0
+        self.expanded = 0
+        # Lazy-deletion heap, _queued holds the current key of every cell in the queue.
+        self._open: list[tuple[TKey, TPosition]] = []
+        self._queued: dict[TPosition, TKey] = {}
+        self._push(goal)
+        self.compute_shortest_path()
+
+    def _neighbours(self, position: TPosition) -> list[TPosition]:
+        x, y = position
+        return [
+            (x + dx, y + dy)
+            for dx, dy in NEIGHBOUR_OFFSETS
+            if 0 <= x + dx < self.world.world_x_limit and 0 <= y + dy < self.world.world_y_limit
+        ]
+
+    def _cost(self, a: TPosition, b: TPosition) -> float:
+        if self.world.w[a] or self.world.w[b]:
+            return INF
+        return self.world.step_cost(a, b)
+
+    def _key(self, position: TPosition) -> TKey:
+        best = min(self.g.get(position, INF), self.rhs.get(position, INF))
+        # rounded so that sums of irrational step costs compare equal when they tie
+        return round(best + self.world.heuristic(self.start, position) + self.km, 6), best
+
+    def _push(self, position: TPosition) -> None:
+        key = self._key(position)
+        self._queued[position] = key
+        heapq.heappush(self._open, (key, position))
+
+    def _top_key(self) -> TKey:
+        while self._open:
+            key, position = self._open[0]
+            if self._queued.get(position) == key:
+                return key
+            heapq.heappop(self._open)
+        return INF, INF
+
+    def _update_vertex(self, position: TPosition) -> None:
+        if position != self.goal:
+            self.rhs[position] = min(
+                (self._cost(position, n) + self.g.get(n, INF) for n in self._neighbours(position)),
+                default=INF,
+            )
+        self._queued.pop(position, None)
+        if self.g.get(position, INF) != self.rhs.get(position, INF):
+            self._push(position)
+
+    def compute_shortest_path(self) -> None:
+        """Expand inconsistent cells until the start is consistent and no better key remains."""
+        while self._top_key() < self._key(self.start) or self.rhs.get(
+            self.start, INF
+        ) != self.g.get(self.start, INF):
+            old_key, position = heapq.heappop(self._open)
+            del self._queued[position]
+            self.expanded += 1
+            new_key = self._key(position)
+            if old_key < new_key:
+                self._push(position)
+            elif self.g.get(position, INF) > self.rhs.get(position, INF):
+                self.g[position] = self.rhs[position]
+                for n in self._neighbours(position):
+                    self._update_vertex(n)
+            else:
+                self.g[position] = INF
+                self._update_vertex(position)
+                for n in self._neighbours(position):
+                    self._update_vertex(n)
+
+    def update_cells(self, cells: list[TPosition], value: int = 1) -> None:
+        """Change cells of the world and repair the search around them."""
+        self.world.update_cells(cells, value)
+        self._repair(cells)
+
+    def update_costs(self, cells: list[TPosition], cost: float) -> None:
+        """Change the traversal cost of cells and repair the search around them."""
+        self.world.update_costs(cells, cost)
+        self._repair(cells)
+
+    def _repair(self, cells: list[TPosition]) -> None:
+        for cell in cells:
+            self._update_vertex(cell)
+            for n in self._neighbours(cell):
+                self._update_vertex(n)
+        self.compute_shortest_path()
+
+    def move_to(self, position: TPosition) -> None:
+        """Move the agent, g-values are goal distances so they stay valid.
+
+        Queued keys were computed for the old start, km raises every new key by the distance
+        moved instead of reordering the queue.
+        """
+        self.km += self.world.heuristic(self.start, position)
+        self.start = position
+        self.compute_shortest_path()
+
+    def path(self) -> list[TPosition]:
+        """Follow the g-values from the start, only the start is returned without a path."""
+        if self.g.get(self.start, INF) == INF:
+            return [self.start]
+        path = [self.start]
+        current = self.start
+        while current != self.goal:
+            neighbours = self._neighbours(current)
+            costs = [self._cost(current, n) + self.g.get(n, INF) for n in neighbours]
+            current = neighbours[costs.index(min(costs))]
+            path.append(current)
+        return path
+
+
+if __name__ == "__main__":
+    world = Gridworld((20, 20))
+    planner = DStarLite(world, (0, 0), (19, 19))
+    print(f"initial plan: {planner.expanded} expansions")
+    path = planner.path()
+    planner.move_to(path[5])
+    planner.update_cells([path[10]])
+    print(f"after moving and blocking {path[10]}: {planner.expanded} expansions in total")
+    for cell in planner.path():
+        world.w[cell] = 2
+    print(world.w)
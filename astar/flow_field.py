@@ -0,0 +1,155 @@
+"""Goal-rooted flow field for moving many agents to the same cell of a Gridworld.
+
+Instead of one search per agent, a single wavefront spreads from the goal over the whole grid
+and records the distance of every cell to the goal, under the move costs of the Gridworld. Each
+wave relaxes the neighbours of every cell whose distance improved in the previous wave, all at
+once with NumPy index arithmetic, so the work per wave is proportional to its size rather than
+done cell by cell in Python. Waves stop once no distance improves. Every cell then points at
+the neighbour it is cheapest to reach the goal through, and an agent finds its path by
+following those directions, in time proportional to the path length.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from astar.astar import NEIGHBOUR_OFFSETS, SQRT2, Gridworld
+
+TPosition = tuple[int, int]
+
+INF = float("inf")
+
+
+class FlowField:
+    """
+    >>> world = Gridworld()
+    >>> world.w[1:5, 2] = 1
+    >>> field = FlowField(world, (4, 4))
+    >>> round(float(field.distance[4, 0]), 2), float(field.distance[1, 2])
+    (9.66, inf)
+    >>> field.path((4, 0))
+    [(4, 0), (3, 0), (2, 0), (1, 1), (0, 2), (1, 3), (2, 3), (3, 3), (4, 4)]
+    >>> field.next_step((0, 2)), field.next_step((4, 4))
+    ((1, 3), None)
+    >>> world.update_cells([(0, 2)])
+    >>> field.stale
+    True
+    >>> field.path((4, 0))
+    [(4, 0)]
+    """
+
+    def __init__(self, world: Gridworld, goal: TPosition) -> None:
+        self.world = world
+        self.goal = goal
+        self.version = world.version
+        self.distance = self._distances()
+        self.direction = self._directions()
+
+    @property
+    def stale(self) -> bool:
+        """Whether the world changed since the field was computed."""
+        return self.world.version != self.version
+
+    def update(self) -> None:
+        """Recompute the field for the current cells of the world."""
+        self.version = self.world.version
+        self.distance = self._distances()
+        self.direction = self._directions()
+
+    def _distances(self) -> np.ndarray:
+        rows, columns = self.world.w.shape
+        free = (np.asarray(self.world.w) == 0).ravel()
+        costs = None if self.world.costs is None else self.world.costs.ravel()
+        distance = np.full(rows * columns, INF)
+        goal = self.goal[0] * columns + self.goal[1]
+        if not free[goal]:
+            return distance.reshape(rows, columns)
+        distance[goal] = 0
+        frontier = np.array([goal])
+        while frontier.size:
+            x, y = np.divmod(frontier, columns)
+            targets = []
+            values = []
+            for dx, dy in NEIGHBOUR_OFFSETS:
+                inside = (0 <= x + dx) & (x + dx < rows) & (0 <= y + dy) & (y + dy < columns)
+                sources = frontier[inside]
+                reached = sources + dx * columns + dy
+                open_cells = free[reached]
+                sources, reached = sources[open_cells], reached[open_cells]
+                length = SQRT2 if dx and dy else 1.0
+                targets.append(reached)
+                if costs is None:
+                    values.append(distance[sources] + length)
+                else:
+                    step = length * (costs[sources] + costs[reached]) / 2
+                    values.append(distance[sources] + step)
+            targets = np.concatenate(targets)
+            values = np.concatenate(values)
+            # keep the smallest value reaching every target
+            order = np.lexsort((values, targets))
+            targets, values = targets[order], values[order]
+            first = np.ones(len(targets), dtype=bool)
+            first[1:] = targets[1:] != targets[:-1]
+            targets, values = targets[first], values[first]
+            improved = values < distance[targets]
+            frontier = targets[improved]
+            distance[frontier] = values[improved]
+        return distance.reshape(rows, columns)
+
+    def _directions(self) -> np.ndarray:
+        """Index into NEIGHBOUR_OFFSETS of the best move from every cell, -1 where none."""
+        rows, columns = self.distance.shape
+        padded_distance = np.pad(self.distance, 1, constant_values=INF)
+        costs = self.world.costs
+        if costs is not None:
+            padded_costs = np.pad(costs, 1, constant_values=1)
+        through = []
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            window = (slice(1 + dx, 1 + dx + rows), slice(1 + dy, 1 + dy + columns))
+            length = SQRT2 if dx and dy else 1.0
+            step = length if costs is None else length * (costs + padded_costs[window]) / 2
+            through.append(padded_distance[window] + step)
+        direction = np.argmin(np.stack(through), axis=0).astype(np.int8)
+        # only cells that can reach the goal move, and the goal itself stays put
+        direction[~np.isfinite(self.distance) | (self.distance == 0)] = -1
+        return direction
+
+    def next_step(self, position: TPosition) -> TPosition | None:
+        """The neighbour to move to from position, None at the goal or out of its reach."""
+        index = self.direction[position]
+        if index < 0:
+            return None
+        dx, dy = NEIGHBOUR_OFFSETS[index]
+        return position[0] + dx, position[1] + dy
+
+    def path(self, start: TPosition) -> list[TPosition]:
+        """Follow the field from start to the goal, only the start is returned without a path.
+
+        A stale field is recomputed first.
+        """
+        if self.stale:
+            self.update()
+        if self.distance[start] == INF:
+            return [start]
+        path = [start]
+        position = self.next_step(start)
+        while position is not None:
+            path.append(position)
+            position = self.next_step(position)
+        return path
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    world = Gridworld(w=(rng.random((500, 500)) < 0.25).astype(np.uint8))
+    world.w[250, 250] = 0
+    start_time = time.time()
+    field = FlowField(world, (250, 250))
+    print(f"flow field in {time.time() - start_time:f} seconds")
+
+    agents = [tuple(map(int, p)) for p in np.argwhere(np.isfinite(field.distance))[::500]]
+    start_time = time.time()
+    lengths = [len(field.path(agent)) for agent in agents]
+    print(f"{len(agents)} paths, {sum(lengths)} steps in {time.time() - start_time:f} seconds")
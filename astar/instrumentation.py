@@ -0,0 +1,117 @@
+"""Optional hooks reporting what a search does while it runs.
+
+The searchers accept a hooks object and call its methods at fixed points of the search:
+
+    on_phase(name)         a new phase of the search starts, such as "search" or "retrace"
+    on_push(position, n)   position was added to the open list, which now holds n entries
+    on_expand(position)    position was taken off the open list and its successors generated
+    on_heuristic(position) the heuristic was evaluated for position
+    on_goal(position)      the goal was taken off the open list
+    on_finish(path)        the search returns path, also when no path was found
+
+Subclass SearchHooks to implement only some of them, for example to trace a search. Without
+hooks the searchers skip every call, so an uninstrumented search pays a single None check per
+event.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Hashable
+
+
+class SearchHooks:
+    """Hooks that ignore every event."""
+
+    def on_phase(self, name: str) -> None:
+        pass
+
+    def on_push(self, position: Hashable, open_size: int) -> None:
+        pass
+
+    def on_expand(self, position: Hashable) -> None:
+        pass
+
+    def on_heuristic(self, position: Hashable) -> None:
+        pass
+
+    def on_goal(self, position: Hashable) -> None:
+        pass
+
+    def on_finish(self, path: list) -> None:
+        pass
+
+
+class SearchStats(SearchHooks):
+    """
+    Counters of one or more searches.
+
+    reopened counts the expansions of positions that had already been expanded, phases holds the
+    seconds spent in each phase.
+
+    >>> from astar.astar import Cell, Gridworld, astar
+    >>> world = Gridworld()
+    >>> world.w[1:4, 2] = 1
+    >>> start, goal = Cell(), Cell()
+    >>> start.position, goal.position = (2, 0), (2, 4)
+    >>> stats = SearchStats()
+    >>> len(astar(world, start, goal, hooks=stats))
+    5
+    >>> stats.expanded, stats.pushed, stats.reopened, stats.open_peak, stats.path_length
+    (8, 20, 0, 12, 5)
+    >>> sorted(stats.phases)
+    ['retrace', 'search']
+    """
+
+    def __init__(self) -> None:
+        self.expanded = 0
+        self.pushed = 0
+        self.reopened = 0
+        self.heuristic_calls = 0
+        self.open_peak = 0
+        self.path_length: int | None = None
+        self.phases: dict[str, float] = {}
+        self._expanded_positions: set[Hashable] = set()
+        self._phase: str | None = None
+        self._phase_start = 0.0
+
+    def on_phase(self, name: str) -> None:
+        now = time.perf_counter()
+        self._end_phase(now)
+        self._phase = name
+        self._phase_start = now
+
+    def on_push(self, position: Hashable, open_size: int) -> None:
+        self.pushed += 1
+        if open_size > self.open_peak:
+            self.open_peak = open_size
+
+    def on_expand(self, position: Hashable) -> None:
+        self.expanded += 1
+        if position in self._expanded_positions:
+            self.reopened += 1
+        else:
+            self._expanded_positions.add(position)
+
+    def on_heuristic(self, position: Hashable) -> None:
+        self.heuristic_calls += 1
+
+    def on_finish(self, path: list) -> None:
+        self._end_phase(time.perf_counter())
+        self._phase = None
+        self.path_length = len(path)
+
+    def as_dict(self) -> dict:
+        return {
+            "expanded": self.expanded,
+            "pushed": self.pushed,
+            "reopened": self.reopened,
+            "heuristic_calls": self.heuristic_calls,
+            "open_peak": self.open_peak,
+            "path_length": self.path_length,
+            "phases": dict(self.phases),
+        }
+
+    def _end_phase(self, now: float) -> None:
+        if self._phase is not None:
+            self.phases[self._phase] = self.phases.get(self._phase, 0.0) + now - self._phase_start
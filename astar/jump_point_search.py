@@ -0,0 +1,182 @@
+"""Jump Point Search is an optimisation of A* for uniform-cost grids with eight-way movement.
+
+Instead of pushing every neighbour of an expanded cell, JPS prunes the neighbours that can be
+reached at least as cheaply without passing through the cell and then "jumps" in a straight or
+diagonal line until it reaches the goal or a cell with a forced neighbour (a neighbour that only
+becomes optimal because an obstacle blocks the symmetric path). Only these jump points are pushed
+onto the open list, so large open areas are crossed with a handful of expansions.
+
+Straight moves cost 1 and diagonal moves cost sqrt(2), the metric JPS symmetry pruning is defined
+for, and the octile distance is used as the heuristic. Worlds with terrain costs can only be
+searched when every cell costs the same.
+
+https://en.wikipedia.org/wiki/Jump_point_search
+"""
+
+import heapq
+
+import numpy as np
+
+from astar.astar import NEIGHBOUR_OFFSETS, Cell, Gridworld, octile_distance
+
+
+def _free(blocked, x, y):
+    return 0 <= x < len(blocked) and 0 <= y < len(blocked[0]) and not blocked[x][y]
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def _pruned_directions(blocked, position, parent):
+    """Return the directions worth exploring from position when arriving from parent."""
+    x, y = position
+    if parent is None:
+        return [(dx, dy) for dx, dy in NEIGHBOUR_OFFSETS if _free(blocked, x + dx, y + dy)]
+
+    dx = _sign(x - parent[0])
+    dy = _sign(y - parent[1])
+    directions = []
+    if dx and dy:
+        if _free(blocked, x + dx, y):
+            directions.append((dx, 0))
+        if _free(blocked, x, y + dy):
+            directions.append((0, dy))
+        if _free(blocked, x + dx, y + dy):
+            directions.append((dx, dy))
+        if not _free(blocked, x - dx, y) and _free(blocked, x - dx, y + dy):
+            directions.append((-dx, dy))
+        if not _free(blocked, x, y - dy) and _free(blocked, x + dx, y - dy):
+            directions.append((dx, -dy))
+    elif dx:
+        if _free(blocked, x + dx, y):
+            directions.append((dx, 0))
+        for side in (-1, 1):
+            if not _free(blocked, x, y + side) and _free(blocked, x + dx, y + side):
+                directions.append((dx, side))
+    else:
+        if _free(blocked, x, y + dy):
+            directions.append((0, dy))
+        for side in (-1, 1):
+            if not _free(blocked, x + side, y) and _free(blocked, x + side, y + dy):
+                directions.append((side, dy))
+    return directions
+
+
+def _jump(blocked, x, y, dx, dy, goal):
+    """Step from (x, y) in direction (dx, dy) and return the next jump point or None."""
+    while True:
+        x += dx
+        y += dy
+        if not _free(blocked, x, y):
+            return None
+        if (x, y) == goal:
+            return x, y
+        if dx and dy:
+            if (not _free(blocked, x - dx, y) and _free(blocked, x - dx, y + dy)) or (
+                not _free(blocked, x, y - dy) and _free(blocked, x + dx, y - dy)
+            ):
+                return x, y
+            if (
+                _jump(blocked, x, y, dx, 0, goal) is not None
+                or _jump(blocked, x, y, 0, dy, goal) is not None
+            ):
+                return x, y
+        elif dx:
+            for side in (-1, 1):
+                if not _free(blocked, x, y + side) and _free(blocked, x + dx, y + side):
+                    return x, y
+        else:
+            for side in (-1, 1):
+                if not _free(blocked, x + side, y) and _free(blocked, x + side, y + dy):
+                    return x, y
+
+
+def jump_point_search(world, start, goal):
+    """
+    Jump Point Search with the same call shape as astar().
+    world : Object of the world object, non-zero cells of world.w are obstacles.
+    start : Object of the cell as  start position.
+    stop  : Object of the cell as goal position.
+
+    Returns every cell of the path, not only the jump points. If the goal can not be reached only
+    the start position is returned.
+
+    >>> p = Gridworld()
+    >>> start = Cell()
+    >>> start.position = (0, 0)
+    >>> goal = Cell()
+    >>> goal.position = (4, 4)
+    >>> jump_point_search(p, start, goal)
+    [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)]
+    >>> p.w[1:5, 2] = 1
+    >>> goal.position = (4, 3)
+    >>> jump_point_search(p, start, goal)
+    [(0, 0), (0, 1), (0, 2), (1, 3), (2, 3), (3, 3), (4, 3)]
+    """
+    if not world.uniform_costs:
+        raise ValueError("Jump Point Search needs a world where every cell costs the same")
+    # Row lists are much faster to probe cell by cell than NumPy scalar indexing.
+    blocked = (np.asarray(world.w) != 0).tolist()
+    start_position = start.position
+    goal_position = goal.position
+    _open = [(octile_distance(start_position, goal_position), 0, start_position)]
+    g = {start_position: 0}
+    parent = {start_position: None}
+    _closed = set()
+    counter = 1
+
+    while _open:
+        _, _, current = heapq.heappop(_open)
+        if current in _closed:
+            continue
+        _closed.add(current)
+        if current == goal_position:
+            break
+        for dx, dy in _pruned_directions(blocked, current, parent[current]):
+            jump_point = _jump(blocked, current[0], current[1], dx, dy, goal_position)
+            if jump_point is None or jump_point in _closed:
+                continue
+            new_g = g[current] + octile_distance(current, jump_point)
+            if new_g >= g.get(jump_point, float("inf")):
+                continue
+            g[jump_point] = new_g
+            parent[jump_point] = current
+            f = new_g + octile_distance(jump_point, goal_position)
+            heapq.heappush(_open, (f, counter, jump_point))
+            counter += 1
+    else:
+        return [start_position]
+
+    jump_points = []
+    current = goal_position
+    while current is not None:
+        jump_points.append(current)
+        current = parent[current]
+    jump_points.reverse()
+
+    # Jump points are joined by straight or diagonal lines, fill in the cells between them.
+    path = [start_position]
+    for (x1, y1), (x2, y2) in zip(jump_points, jump_points[1:]):
+        dx = _sign(x2 - x1)
+        dy = _sign(y2 - y1)
+        while (x1, y1) != (x2, y2):
+            x1 += dx
+            y1 += dy
+            path.append((x1, y1))
+    return path
+
+
+if __name__ == "__main__":
+    world = Gridworld((20, 20))
+    world.w[2:18, 10] = 1
+    start = Cell()
+    start.position = (10, 0)
+    goal = Cell()
+    goal.position = (10, 19)
+    print(f"path from {start.position} to {goal.position}")
+    s = jump_point_search(world, start, goal)
+    #   Just for visual reasons.
+    for i in s:
+        world.w[i] = 2
+    print(world.w)
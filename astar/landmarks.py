@@ -0,0 +1,152 @@
+"""ALT (A*, Landmarks and the Triangle inequality) differential heuristics.
+
+A handful of landmark cells is chosen far apart from each other and a Dijkstra from every
+landmark records its exact distance to every cell. By the triangle inequality, for any landmark L
+the true distance between a and b is at least |d(L, a) - d(L, b)|, so the largest such difference
+is an admissible and consistent heuristic. Unlike straight-line distances it accounts for walls,
+which makes a big difference on maze-like maps.
+
+The distances are computed once per map and saved as a float64 .npy file that later runs
+memory-map. They are kept in float64 because the difference of two float32 distances of around
+1e4 can exceed the true distance by a rounding error, which would make the heuristic
+inadmissible. The heuristic is only admissible for searches that move like the Dijkstra did, over
+the same cell costs: eight neighbours for the Gridworld searchers, four for bidirectional_a_star,
+greedy_best_first and multi_heuristic_astar.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+
+import numpy as np
+
+from astar.astar import SQRT2
+
+TPosition = tuple[int, int]
+
+INF = float("inf")
+
+MOVES = {
+    4: ((-1, 0), (0, -1), (0, 1), (1, 0)),
+    8: ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)),
+}
+
+
+def distances_from(grid, source: TPosition, connectivity: int = 8, costs=None) -> np.ndarray:
+    """Return the distance from source to every cell of grid, inf where it can not go.
+
+    Moves are priced like on a Gridworld: the mean cost of the two cells, times sqrt(2) for a
+    diagonal move, and costs defaults to 1 for every cell.
+
+    >>> distances_from([[0, 1, 0], [0, 1, 0], [0, 0, 0]], (0, 0)).astype(float).round(2).tolist()
+    [[0.0, inf, 4.83], [1.0, inf, 3.83], [2.0, 2.41, 3.41]]
+    >>> distances_from([[0, 0], [0, 0]], (0, 0), 4, costs=[[1, 3], [1, 1]]).tolist()
+    [[0.0, 2.0], [1.0, 2.0]]
+    """
+    blocked = np.asarray(grid) != 0
+    rows, columns = blocked.shape
+    flat_blocked = blocked.ravel().tolist()
+    flat_costs = [1.0] * (rows * columns) if costs is None else np.ravel(costs).tolist()
+    moves = [
+        (dx, dy, dx * columns + dy, SQRT2 if dx and dy else 1) for dx, dy in MOVES[connectivity]
+    ]
+    distance = [INF] * (rows * columns)
+    source_id = source[0] * columns + source[1]
+    distance[source_id] = 0
+    _open = [(0, source_id)]
+    while _open:
+        d, current = heapq.heappop(_open)
+        if d > distance[current]:
+            continue
+        x, y = divmod(current, columns)
+        for dx, dy, delta, length in moves:
+            if not (0 <= x + dx < rows and 0 <= y + dy < columns):
+                continue
+            n = current + delta
+            if flat_blocked[n]:
+                continue
+            new_d = d + length * (flat_costs[current] + flat_costs[n]) / 2
+            if new_d >= distance[n]:
+                continue
+            distance[n] = new_d
+            heapq.heappush(_open, (new_d, n))
+    return np.array(distance, dtype=np.float64).reshape(rows, columns)
+
+
+class LandmarkHeuristic:
+    """
+    >>> grid = np.zeros((6, 6), dtype=np.uint8)
+    >>> grid[0:5, 3] = 1
+    >>> alt = LandmarkHeuristic.build(grid, 2)
+    >>> alt.landmarks
+    [(0, 5), (0, 0)]
+    >>> from astar.astar import octile_distance
+    >>> round(alt((0, 2), (0, 4)), 2), octile_distance((0, 2), (0, 4))
+    (10.24, 2.0)
+    >>> grid[5, 3] = 1
+    >>> walled = LandmarkHeuristic(distances_from(grid, (0, 5))[np.newaxis])
+    >>> walled((0, 0), (1, 1))
+    0.0
+    """
+
+    def __init__(self, distances: np.ndarray) -> None:
+        self.distances = distances
+        self.landmarks = []
+        for landmark_distances in distances:
+            x, y = np.unravel_index(np.argmin(landmark_distances), landmark_distances.shape)
+            self.landmarks.append((int(x), int(y)))
+
+    @classmethod
+    def build(
+        cls, grid, count: int = 8, connectivity: int = 8, seed: int = 0, costs=None
+    ) -> LandmarkHeuristic:
+        """Pick count landmarks by farthest-point selection and compute their distances.
+
+        The first landmark is the cell farthest from a random free cell, each next one the cell
+        farthest from all landmarks chosen so far.
+        """
+        grid = np.asarray(grid)
+        free = np.argwhere(grid == 0)
+        rng = np.random.default_rng(seed)
+        origin = tuple(int(v) for v in free[rng.integers(len(free))])
+        closest = distances_from(grid, origin, connectivity, costs)
+        distances: list[np.ndarray] = []
+        for _ in range(count):
+            reachable = np.where(np.isfinite(closest), closest, -1)
+            landmark = np.unravel_index(np.argmax(reachable), grid.shape)
+            landmark = (int(landmark[0]), int(landmark[1]))
+            distances.append(distances_from(grid, landmark, connectivity, costs))
+            closest = distances[-1] if len(distances) == 1 else np.minimum(closest, distances[-1])
+        return cls(np.stack(distances))
+
+    def save(self, path: str | os.PathLike) -> None:
+        np.save(path, self.distances)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> LandmarkHeuristic:
+        """Load distances saved by save(), the file is memory-mapped rather than read."""
+        return cls(np.load(path, mmap_mode="r"))
+
+    def __call__(self, a: TPosition, b: TPosition) -> float:
+        to_a = self.distances[:, a[0], a[1]]
+        to_b = self.distances[:, b[0], b[1]]
+        reachable = np.isfinite(to_a) & np.isfinite(to_b)
+        if not reachable.all() and (np.isfinite(to_a) != np.isfinite(to_b)).any():
+            # a landmark reaches only one of them, so they are not connected
+            return INF
+        # a landmark reaching neither of them tells nothing, and inf - inf would be nan
+        return float(np.abs(to_a[reachable] - to_b[reachable]).max(initial=0))
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from astar.movingai import load_map
+
+    grid = load_map(sys.argv[1])
+    start_time = time.time()
+    alt = LandmarkHeuristic.build(grid, int(sys.argv[2]) if len(sys.argv) > 2 else 8)
+    alt.save(sys.argv[1] + ".landmarks.npy")
+    print(f"{len(alt.landmarks)} landmarks in {time.time() - start_time:f} seconds")
@@ -0,0 +1,149 @@
+"""Loaders for the MovingAI pathfinding benchmark formats.
+
+A .map file is a short header ("type", "height", "width", "map") followed by one line of
+characters per row. ".", "G" and "S" are passable, every other terrain ("@", "O", "T", "W") is
+treated as an obstacle. The grid is returned as a uint8 array using the same convention as the
+searchers here: 0 for free cells and 1 for obstacles.
+
+Parsing is done once: the grid is saved next to the map as "<name>.map.npy" and loads
+memory-map that file, so large maps open in milliseconds. A .scen file lists one query per line,
+its coordinates are converted from MovingAI (x, y) to (row, column) positions.
+
+https://movingai.com/benchmarks/formats.html
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+PASSABLE = b".GS"
+
+TPosition = tuple[int, int]
+
+
+class Scenario(NamedTuple):
+    bucket: int
+    map: str
+    width: int
+    height: int
+    start: TPosition
+    goal: TPosition
+    optimal_length: float
+
+
+def cache_path(path: str | os.PathLike) -> Path:
+    """Return where the parsed grid of the map at path is cached."""
+    path = Path(path)
+    return path.with_name(path.name + ".npy")
+
+
+def parse_map(text: bytes) -> np.ndarray:
+    """
+    Parse the contents of a .map file.
+
+    >>> parse_map(b"type octile\\nheight 2\\nwidth 3\\nmap\\n.@.\\nG.T\\n")
+    array([[0, 1, 0],
+           [0, 0, 1]], dtype=uint8)
+    """
+    lines = text.splitlines()
+    header = {}
+    for row, line in enumerate(lines):
+        if line.strip() == b"map":
+            break
+        key, _, value = line.decode().partition(" ")
+        header[key] = value.strip()
+    else:
+        raise ValueError("Missing 'map' line in map header")
+
+    height = int(header["height"])
+    width = int(header["width"])
+    first, last = row + 1, row + 1 + height
+    rows = [line[:width] for line in lines[first:last]]
+    if len(rows) != height or any(len(line) != width for line in rows):
+        raise ValueError(f"Expected {height} rows of {width} cells")
+    cells = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(height, width)
+    return (~np.isin(cells, np.frombuffer(PASSABLE, dtype=np.uint8))).astype(np.uint8)
+
+
+def load_map(path: str | os.PathLike, cache: bool = True) -> np.ndarray:
+    """Load a .map file as a read-only grid, memory-mapping its cached grid.
+
+    The grid is cached on the first load and whenever the map is newer than its cache. Where the
+    cache can not be written the map is parsed on every load. Either way the grid is read-only,
+    copy it to change cells.
+
+    >>> import tempfile
+    >>> folder = tempfile.mkdtemp()
+    >>> map_path = os.path.join(folder, "tiny.map")
+    >>> with open(map_path, "w") as f:
+    ...     _ = f.write("type octile\\nheight 1\\nwidth 2\\nmap\\n.@\\n")
+    >>> grids = [load_map(map_path), load_map(map_path), load_map(map_path, cache=False)]
+    >>> [(grid.tolist(), grid.flags.writeable) for grid in grids]
+    [([[0, 1]], False), ([[0, 1]], False), ([[0, 1]], False)]
+    >>> import shutil
+    >>> shutil.rmtree(folder)
+    """
+    cached = cache_path(path)
+    if cache and cached.exists() and cached.stat().st_mtime >= os.stat(path).st_mtime:
+        return np.load(cached, mmap_mode="r")
+
+    with open(path, "rb") as f:
+        grid = parse_map(f.read())
+    if cache:
+        try:
+            np.save(cached, grid)
+        except OSError:
+            # a read-only folder, the map is parsed again next time
+            pass
+        else:
+            return np.load(cached, mmap_mode="r")
+    grid.flags.writeable = False
+    return grid
+
+
+def load_scen(path: str | os.PathLike) -> list[Scenario]:
+    """
+    Load the queries of a .scen file.
+
+    >>> import tempfile
+    >>> with tempfile.NamedTemporaryFile("w", suffix=".scen", delete=False) as f:
+    ...     _ = f.write("version 1\\n0\\tmaze.map\\t8\\t4\\t1\\t2\\t7\\t3\\t6.41421356\\n")
+    >>> load_scen(f.name)  # doctest: +NORMALIZE_WHITESPACE
+    [Scenario(bucket=0, map='maze.map', width=8, height=4, start=(2, 1), goal=(3, 7),
+              optimal_length=6.41421356)]
+    >>> os.remove(f.name)
+    """
+    scenarios = []
+    with open(path) as f:
+        for line in f:
+            fields = line.split("\t")
+            if len(fields) != 9:
+                # version line or blank line
+                continue
+            bucket, map_name, width, height, start_x, start_y, goal_x, goal_y, length = fields
+            scenarios.append(
+                Scenario(
+                    int(bucket),
+                    map_name,
+                    int(width),
+                    int(height),
+                    (int(start_y), int(start_x)),
+                    (int(goal_y), int(goal_x)),
+                    float(length),
+                )
+            )
+    return scenarios
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for map_path in sys.argv[1:]:
+        start_time = time.time()
+        grid = load_map(map_path)
+        print(f"{map_path}: {grid.shape} in {time.time() - start_time:f} seconds")
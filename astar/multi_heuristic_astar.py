@@ -1,5 +1,6 @@
-import heapq
-import sys
+from __future__ import annotations
+
+from typing import NamedTuple
 
 import numpy as np
 
@@ -7,9 +8,24 @@ TPos = tuple[int, int]
 
 
 class PriorityQueue:
+    """
+    Indexed binary heap: index maps every queued item to its slot in elements, so an item can
+    be found, updated and removed in O(log n) without searching the heap.
+
+    >>> queue = PriorityQueue()
+    >>> for item, priority in [("a", 3), ("b", 1), ("c", 2)]:
+    ...     queue.put(item, priority)
+    >>> queue.put("a", 0)
+    >>> queue.remove_element("c")
+    >>> queue.minkey(), queue.top_show()
+    (0, 'a')
+    >>> queue.get(), queue.get(), queue.empty()
+    ((0, 'a'), (1, 'b'), True)
+    """
+
     def __init__(self):
         self.elements = []
-        self.set = set()
+        self.index = {}
 
     def minkey(self):
         if not self.empty():
@@ -21,64 +37,297 @@ class PriorityQueue:
         return len(self.elements) == 0
 
     def put(self, item, priority):
-        if item not in self.set:
-            heapq.heappush(self.elements, (priority, item))
-            self.set.add(item)
+        if item not in self.index:
+            self.elements.append((priority, item))
+            self.index[item] = len(self.elements) - 1
+            self._sift_up(len(self.elements) - 1)
         else:
             # update
-            # print("update", item)
-            temp = []
-            (pri, x) = heapq.heappop(self.elements)
-            while x != item:
-                temp.append((pri, x))
-                (pri, x) = heapq.heappop(self.elements)
-            temp.append((priority, item))
-            for pro, xxx in temp:
-                heapq.heappush(self.elements, (pro, xxx))
+            position = self.index[item]
+            self.elements[position] = (priority, item)
+            self._sift_up(position)
+            self._sift_down(self.index[item])
 
     def remove_element(self, item):
-        if item in self.set:
-            self.set.remove(item)
-            temp = []
-            (pro, x) = heapq.heappop(self.elements)
-            while x != item:
-                temp.append((pro, x))
-                (pro, x) = heapq.heappop(self.elements)
-            for prito, yyy in temp:
-                heapq.heappush(self.elements, (prito, yyy))
+        if item in self.index:
+            position = self.index.pop(item)
+            last = self.elements.pop()
+            if position < len(self.elements):
+                # the last entry fills the hole and moves to where it belongs
+                self.elements[position] = last
+                self.index[last[1]] = position
+                self._sift_up(position)
+                self._sift_down(self.index[last[1]])
 
     def top_show(self):
         return self.elements[0][1]
 
     def get(self):
-        (priority, item) = heapq.heappop(self.elements)
-        self.set.remove(item)
+        (priority, item) = self.elements[0]
+        self.remove_element(item)
         return (priority, item)
 
-
-def consistent_heuristic(p: TPos, goal: TPos):
+    def _sift_up(self, position):
+        elements, index = self.elements, self.index
+        entry = elements[position]
+        while position > 0:
+            parent = (position - 1) // 2
+            if not entry < elements[parent]:
+                break
+            elements[position] = elements[parent]
+            index[elements[position][1]] = position
+            position = parent
+        elements[position] = entry
+        index[entry[1]] = position
+
+    def _sift_down(self, position):
+        elements, index = self.elements, self.index
+        size = len(elements)
+        entry = elements[position]
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and elements[child + 1] < elements[child]:
+                child += 1
+            if not elements[child] < entry:
+                break
+            elements[position] = elements[child]
+            index[elements[position][1]] = position
+            position = child
+        elements[position] = entry
+        index[entry[1]] = position
+
+
+# The heuristics take either a single position or an (k, 2) array of positions, in which case
+# they return the k values from one vectorized call.
+
+
+def consistent_heuristic(p: TPos | np.ndarray, goal: TPos):
+    """
+    >>> float(consistent_heuristic((0, 0), (3, 4)))
+    5.0
+    >>> consistent_heuristic(np.array([[0, 0], [3, 0]]), (3, 4)).tolist()
+    [5.0, 4.0]
+    """
     # euclidean distance
-    a = np.array(p)
-    b = np.array(goal)
-    return np.linalg.norm(a - b)
+    return np.hypot(*(np.asarray(p) - goal).T)
 
 
-def heuristic_2(p: TPos, goal: TPos):
+def heuristic_2(p: TPos | np.ndarray, goal: TPos, t: int = 1):
+    """
+    >>> heuristic_2(np.array([[0, 0], [3, 0]]), (3, 4), t=2).tolist()
+    [2.0, 2.0]
+    """
     # integer division by time variable
     return consistent_heuristic(p, goal) // t
 
 
-def heuristic_1(p: TPos, goal: TPos):
+def heuristic_1(p: TPos | np.ndarray, goal: TPos):
+    """
+    >>> heuristic_1(np.array([[0, 0], [3, 0]]), (3, 4)).tolist()
+    [7, 4]
+    """
     # manhattan distance
-    return abs(p[0] - goal[0]) + abs(p[1] - goal[1])
-
+    return np.abs(np.asarray(p) - goal).sum(axis=-1)
+
+
+class SearchResult(NamedTuple):
+    path: list[TPos]
+    cost: float
+    anchor_expansions: int
+    inadmissible_expansions: int
+
+
+class MultiHeuristicAStar:
+    """
+    Shared multi-heuristic A*: an anchor search with a consistent heuristic and one search per
+    inadmissible heuristic, expanding a state of an inadmissible queue while its key stays within
+    w2 times the anchor's. The found path costs at most w1 * w2 times the optimum.
+
+    grid: 2D array-like where non-zero cells are obstacles, positions index it as grid[p].
+    heuristics: functions h(p, goal) taking a position or a (k, 2) array of positions, the
+    first one consistent. heuristic_2 is divided by the number of inadmissible rounds of the
+    search so far. The default is consistent_heuristic, heuristic_1 and heuristic_2.
+
+    Every search keeps its state to itself, so one solver answers any number of queries, also
+    from several threads.
+
+    >>> grid = np.zeros((5, 5), dtype=np.uint8)
+    >>> grid[1:5, 2] = 1
+    >>> solver = MultiHeuristicAStar(grid)
+    >>> result = solver.search((4, 0), (4, 4))
+    >>> result.path  # doctest: +NORMALIZE_WHITESPACE
+    [(4, 0), (3, 0), (2, 0), (2, 1), (1, 1), (0, 1), (0, 2), (0, 3), (1, 3), (2, 3), (3, 3),
+     (3, 4), (4, 4)]
+    >>> result.cost, result.anchor_expansions + result.inadmissible_expansions > 0
+    (12.0, True)
+    >>> grid[0, 2] = 1
+    >>> MultiHeuristicAStar(grid).search((4, 0), (4, 4)).path
+    [(4, 0)]
+    >>> MultiHeuristicAStar(grid).search((0, 0), (0, 0))
+    SearchResult(path=[(0, 0)], cost=0.0, anchor_expansions=0, inadmissible_expansions=0)
+    """
+
+    def __init__(self, grid, heuristics=None, w1: float = 1, w2: float = 1) -> None:
+        self.blocked = np.ascontiguousarray(np.asarray(grid) != 0)
+        if heuristics is None:
+            heuristics = (consistent_heuristic, heuristic_1, heuristic_2)
+        if len(heuristics) < 2:
+            raise ValueError("expected a consistent and at least one inadmissible heuristic")
+        self.heuristics = tuple(heuristics)
+        self.w1 = w1
+        self.w2 = w2
+
+    def search(self, start: TPos, goal: TPos, hooks=None) -> SearchResult:
+        """Search a path from start to goal, only start is returned without one.
+
+        hooks is an optional SearchHooks, expansions are timed as "anchor" or "inadmissible".
+        """
+        if start == goal:
+            if hooks is not None:
+                hooks.on_finish([start])
+            return SearchResult([start], 0.0, 0, 0)
+        return _Search(self, start, goal, hooks).run()
+
+
+class _Search:
+    """State of one MultiHeuristicAStar search."""
+
+    def __init__(self, solver: MultiHeuristicAStar, start: TPos, goal: TPos, hooks) -> None:
+        self.solver = solver
+        self.start = start
+        self.goal = goal
+        self.hooks = hooks
+        # rounds of inadmissible expansions, heuristic_2 is divided by it
+        self.t = 1
+        self.g_function = {start: 0, goal: float("inf")}
+        self.back_pointer = {start: -1, goal: -1}
+        self.visited = {start}
+        self.open_list = [PriorityQueue() for _ in solver.heuristics]
+        self.close_list_anchor: set[TPos] = set()
+        self.close_list_inad: set[TPos] = set()
+        # [p] lookups on a memoryview skip the overhead of NumPy indexing
+        self._blocked = solver.blocked.data
+        self.expansions = [0, 0]
+
+    def heuristic(self, i: int, p: TPos | np.ndarray):
+        heuristic = self.solver.heuristics[i]
+        if heuristic is heuristic_2:
+            return heuristic_2(p, self.goal, self.t)
+        return heuristic(p, self.goal)
+
+    def key(self, position: TPos, i: int):
+        return self.g_function[position] + self.solver.w1 * self.heuristic(i, position)
+
+    def keys(self, positions: list[TPos], i: int, g_values: np.ndarray) -> list[float]:
+        """key() of several positions with their g-values, one heuristic call for all of them."""
+        return (g_values + self.solver.w1 * self.heuristic(i, np.array(positions))).tolist()
+
+    def valid(self, p: TPos) -> bool:
+        rows, columns = self.solver.blocked.shape
+        return 0 <= p[0] < rows and 0 <= p[1] < columns and not self._blocked[p]
+
+    def run(self) -> SearchResult:
+        hooks, goal, open_list, g_function = self.hooks, self.goal, self.open_list, self.g_function
+        w2 = self.solver.w2
+        for i in range(len(open_list)):
+            open_list[i].put(self.start, self.key(self.start, i))
+        if hooks is not None:
+            hooks.on_push(self.start, len(open_list))
+
+        while open_list[0].minkey() < float("inf"):
+            for i in range(1, len(open_list)):
+                if open_list[i].minkey() <= w2 * open_list[0].minkey():
+                    self.t += 1
+                    if g_function[goal] <= open_list[i].minkey():
+                        if g_function[goal] < float("inf"):
+                            return self.result()
+                    else:
+                        get_s = open_list[i].top_show()
+                        self.visited.add(get_s)
+                        if hooks is not None:
+                            hooks.on_phase("inadmissible")
+                        self.expand_state(get_s, i)
+                        self.close_list_inad.add(get_s)
+                        self.expansions[1] += 1
+                elif g_function[goal] <= open_list[0].minkey():
+                    if g_function[goal] < float("inf"):
+                        return self.result()
+                else:
+                    get_s = open_list[0].top_show()
+                    self.visited.add(get_s)
+                    if hooks is not None:
+                        hooks.on_phase("anchor")
+                    self.expand_state(get_s, 0)
+                    self.close_list_anchor.add(get_s)
+                    self.expansions[0] += 1
+        if hooks is not None:
+            hooks.on_finish([self.start])
+        return SearchResult([self.start], float("inf"), *self.expansions)
+
+    def expand_state(self, s: TPos, j: int) -> None:
+        """Expand s, taken off the queue of heuristic j, and queue its improved neighbours."""
+        hooks, open_list, g_function = self.hooks, self.open_list, self.g_function
+        if hooks is not None:
+            hooks.on_expand(s)
+        for itera in range(len(open_list)):
+            open_list[itera].remove_element(s)
+        (x, y) = s
+        left = (x - 1, y)
+        right = (x + 1, y)
+        up = (x, y + 1)
+        down = (x, y - 1)
+
+        improved = []
+        for neighbours in [left, right, up, down]:
+            if not self.valid(neighbours):
+                continue
+            if neighbours not in self.visited:
+                self.visited.add(neighbours)
+                self.back_pointer[neighbours] = -1
+                g_function[neighbours] = float("inf")
 
-def key(start: TPos, i: int, goal: TPos, g_function: dict[TPos, float]):
-    ans = g_function[start] + W1 * heuristics[i](start, goal)
-    return ans
+            if g_function[neighbours] > g_function[s] + 1:
+                g_function[neighbours] = g_function[s] + 1
+                self.back_pointer[neighbours] = s
+                if neighbours not in self.close_list_anchor:
+                    improved.append(neighbours)
+        if not improved:
+            return
+
+        # score every improved neighbour with each heuristic in one call
+        w2 = self.solver.w2
+        g_values = np.array([g_function[neighbours] for neighbours in improved])
+        anchor_keys = self.keys(improved, 0, g_values)
+        inad_keys = [self.keys(improved, var, g_values) for var in range(1, len(open_list))]
+        for index, neighbours in enumerate(improved):
+            open_list[0].put(neighbours, anchor_keys[index])
+            if hooks is not None:
+                for _ in range(len(open_list)):
+                    hooks.on_heuristic(neighbours)
+                hooks.on_push(neighbours, sum(len(queue.elements) for queue in open_list))
+            if neighbours not in self.close_list_inad:
+                for var in range(1, len(open_list)):
+                    if inad_keys[var - 1][index] <= w2 * anchor_keys[index]:
+                        open_list[var].put(neighbours, inad_keys[var - 1][index])
+
+    def result(self) -> SearchResult:
+        hooks = self.hooks
+        if hooks is not None:
+            hooks.on_goal(self.goal)
+            hooks.on_phase("retrace")
+        path = [self.goal]
+        while path[-1] != self.start:
+            path.append(self.back_pointer[path[-1]])
+        path.reverse()
+        if hooks is not None:
+            hooks.on_finish(path)
+        return SearchResult(path, float(self.g_function[self.goal]), *self.expansions)
 
 
 def do_something(back_pointer, goal, start):
+    blocked = set(blocks)
     grid = np.chararray((n, n))
     for i in range(n):
         for j in range(n):
@@ -86,7 +335,7 @@ def do_something(back_pointer, goal, start):
 
     for i in range(n):
         for j in range(n):
-            if (j, (n - 1) - i) in blocks:
+            if (j, (n - 1) - i) in blocked:
                 grid[i][j] = "#"
 
     grid[0][(n - 1)] = "-"
@@ -117,58 +366,6 @@ def do_something(back_pointer, goal, start):
         print(x, end=" ")
         x = back_pointer[x]
     print(x)
-    sys.exit()
-
-
-def valid(p: TPos):
-    if p[0] < 0 or p[0] > n - 1:
-        return False
-    if p[1] < 0 or p[1] > n - 1:
-        return False
-    return True
-
-
-def expand_state(
-    s,
-    j,
-    visited,
-    g_function,
-    close_list_anchor,
-    close_list_inad,
-    open_list,
-    back_pointer,
-):
-    for itera in range(n_heuristic):
-        open_list[itera].remove_element(s)
-    # print("s", s)
-    # print("j", j)
-    (x, y) = s
-    left = (x - 1, y)
-    right = (x + 1, y)
-    up = (x, y + 1)
-    down = (x, y - 1)
-
-    for neighbours in [left, right, up, down]:
-        if neighbours not in blocks:
-            if valid(neighbours) and neighbours not in visited:
-                # print("neighbour", neighbours)
-                visited.add(neighbours)
-                back_pointer[neighbours] = -1
-                g_function[neighbours] = float("inf")
-
-            if valid(neighbours) and g_function[neighbours] > g_function[s] + 1:
-                g_function[neighbours] = g_function[s] + 1
-                back_pointer[neighbours] = s
-                if neighbours not in close_list_anchor:
-                    open_list[0].put(neighbours, key(neighbours, 0, goal, g_function))
-                    if neighbours not in close_list_inad:
-                        for var in range(1, n_heuristic):
-                            if key(neighbours, var, goal, g_function) <= W2 * key(
-                                neighbours, 0, goal, g_function
-                            ):
-                                open_list[j].put(
-                                    neighbours, key(neighbours, var, goal, g_function)
-                                )
 
 
 def make_common_ground():
@@ -194,8 +391,6 @@ def make_common_ground():
     return some_list
 
 
-heuristics = {0: consistent_heuristic, 1: heuristic_1, 2: heuristic_2}
-
 blocks_blk = [
     (0, 1),
     (1, 1),
@@ -232,66 +427,30 @@ n_heuristic = 3  # one consistent and two other inconsistent
 start = (0, 0)
 goal = (n - 1, n - 1)
 
-t = 1
-
-
-def multi_a_star(start: TPos, goal: TPos, n_heuristic: int):
-    g_function = {start: 0, goal: float("inf")}
-    back_pointer = {start: -1, goal: -1}
-    open_list = []
-    visited = set()
 
-    for i in range(n_heuristic):
-        open_list.append(PriorityQueue())
-        open_list[i].put(start, key(start, i, goal, g_function))
-
-    close_list_anchor: list[int] = []
-    close_list_inad: list[int] = []
-    while open_list[0].minkey() < float("inf"):
-        for i in range(1, n_heuristic):
-            # print(open_list[0].minkey(), open_list[i].minkey())
-            if open_list[i].minkey() <= W2 * open_list[0].minkey():
-                global t
-                t += 1
-                if g_function[goal] <= open_list[i].minkey():
-                    if g_function[goal] < float("inf"):
-                        do_something(back_pointer, goal, start)
-                else:
-                    _, get_s = open_list[i].top_show()
-                    visited.add(get_s)
-                    expand_state(
-                        get_s,
-                        i,
-                        visited,
-                        g_function,
-                        close_list_anchor,
-                        close_list_inad,
-                        open_list,
-                        back_pointer,
-                    )
-                    close_list_inad.append(get_s)
-            elif g_function[goal] <= open_list[0].minkey():
-                if g_function[goal] < float("inf"):
-                    do_something(back_pointer, goal, start)
-            else:
-                get_s = open_list[0].top_show()
-                visited.add(get_s)
-                expand_state(
-                    get_s,
-                    0,
-                    visited,
-                    g_function,
-                    close_list_anchor,
-                    close_list_inad,
-                    open_list,
-                    back_pointer,
-                )
-                close_list_anchor.append(get_s)
+def multi_a_star(start: TPos, goal: TPos, n_heuristic: int, hooks=None):
+    """Search the module's n x n world with its blocks and weights and print the outcome.
+
+    Returns the path, or only start when the goal can not be reached. Library code should use
+    MultiHeuristicAStar, which takes its world as arguments.
+    """
+    grid = np.zeros((n, n), dtype=np.uint8)
+    blocked = set(blocks)
+    for block in blocked:
+        grid[block] = 1
+    solver = MultiHeuristicAStar(grid, w1=W1, w2=W2)
+    solver.heuristics = solver.heuristics[:n_heuristic]
+    search = _Search(solver, start, goal, hooks)
+    result = search.run()
+    back_pointer = search.back_pointer
+    if result.path[-1] == goal:
+        do_something(back_pointer, goal, start)
+        return result.path
     print("No path found to goal")
     print()
     for i in range(n - 1, -1, -1):
         for j in range(n):
-            if (j, i) in blocks:
+            if (j, i) in blocked:
                 print("#", end=" ")
             elif (j, i) in back_pointer:
                 if (j, i) == (n - 1, n - 1):
@@ -308,6 +467,7 @@ def multi_a_star(start: TPos, goal: TPos, n_heuristic: int):
     print()
     print("# is an obstacle")
     print("- is the path taken by algorithm")
+    return result.path
 
 
 if __name__ == "__main__":
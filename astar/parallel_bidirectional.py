@@ -0,0 +1,189 @@
+"""Bidirectional A* with the forward and the backward search in two worker processes.
+
+Both frontiers are the ones of BidirectionalAStar, but instead of taking turns on one core every
+worker runs its own side to completion. The workers share a single shared memory block holding,
+for both sides, the g-value and parent of every cell, the key at the top of the open list and
+the cheapest meeting found so far. Every slot has a single writer, so no locks are taken: a
+worker that improves a cell reads the g-value the other side has for it to spot a meeting, and
+stops once its top key plus the other side's top key reaches the cheapest meeting cost, which is
+the stopping rule of BidirectionalAStar. A value read while the other side is about to change it
+can only be too pessimistic, which delays stopping but never stops early. After both workers
+are done the parent process joins the sides at the cell with the lowest sum of g-values.
+
+Every search starts two processes and copies the grid into shared memory, which takes about
+20 ms where BidirectionalAStar answers a query on a small map in 1 ms. It only pays off with two
+free cores and queries that take well over that, on maps of hundreds of thousands of cells.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from astar.bidirectional_a_star import AStar, BidirectionalAStar, _BalancedFrontier
+from astar.shared_grid import GridHandle, Layout, SharedGrid, array_views, attach, layout_size
+
+TPosition = tuple[int, int]
+
+INF = float("inf")
+
+FORWARD, BACKWARD = 0, 1
+
+
+def _state_layout(cells: int) -> Layout:
+    """Arrays of the two sides in the shared state, indexed by side first."""
+    return (
+        ("g", np.float64, (2, cells)),
+        ("parent", np.int64, (2, cells)),
+        ("top", np.float64, (2, 1)),
+        ("mu", np.float64, (2, 1)),
+        ("expanded", np.int64, (2, 1)),
+    )
+
+
+def _run_frontier(
+    side: int,
+    grid: GridHandle,
+    state_name: str,
+    origin: TPosition,
+    target: TPosition,
+    delta,
+    heuristic,
+    costs,
+) -> None:
+    """Worker process searching from origin towards target."""
+    frontier = _BalancedFrontier(
+        AStar(origin, target, costs=costs, grid=attach(grid), delta=delta, heuristic=heuristic)
+    )
+    block = shared_memory.SharedMemory(name=state_name)
+    try:
+        _search_side(frontier, side, array_views(block.buf, _state_layout(frontier.grid.size)))
+    finally:
+        block.close()
+
+
+def _search_side(frontier: _BalancedFrontier, side: int, state: dict[str, np.ndarray]) -> None:
+    """Expand frontier until the stopping rule holds, publishing its progress in state."""
+    g, other_g = state["g"][side], state["g"][1 - side]
+    parent = state["parent"][side]
+    top, mu = state["top"][:, 0], state["mu"][:, 0]
+    # the frontier numbers cells by their flat ids, as the state does
+    g[frontier.origin] = 0
+    expanded = 0
+    while True:
+        cell = frontier.peek()
+        # keys only grow, so the other side can rely on every published key
+        key = INF if cell is None else frontier.open_nodes[0][0]
+        top[side] = key
+        if key == INF or key + top[1 - side] >= min(mu[0], mu[1]):
+            break
+        for child in frontier.expand(cell):
+            child_g = frontier.g[child]
+            g[child] = child_g
+            parent[child] = cell
+            if child_g + other_g[child] < mu[side]:
+                mu[side] = child_g + other_g[child]
+        expanded += 1
+    state["expanded"][side, 0] = expanded
+
+
+class ParallelBidirectionalAStar(BidirectionalAStar):
+    """
+    BidirectionalAStar with each side in its own process. The heuristic and the costs are sent
+    to the workers, so they have to be picklable. Hooks are not supported, expanded holds the
+    number of expansions of the forward and the backward side after a search.
+
+    >>> grid = [[0, 0, 0, 0], [0, 1, 1, 0], [0, 1, 0, 0], [0, 0, 0, 1]]
+    >>> path = ParallelBidirectionalAStar((0, 0), (2, 2), grid=grid).search()
+    >>> len(path), path[0], path[-1]
+    (7, (0, 0), (2, 2))
+    >>> ParallelBidirectionalAStar((0, 0), (3, 3), grid=grid).search()
+    [(0, 0)]
+    """
+
+    def __init__(
+        self,
+        start: TPosition,
+        goal: TPosition,
+        costs=None,
+        grid=None,
+        delta=None,
+        heuristic=None,
+    ) -> None:
+        super().__init__(start, goal, costs=costs, grid=grid, delta=delta, heuristic=heuristic)
+        self.expanded = (0, 0)
+
+    def search(self) -> list[TPosition]:
+        start, goal = self.fwd_astar.start.pos, self.bwd_astar.start.pos
+        if not self.fwd_astar.endpoints_free():
+            return [start]
+        if start == goal:
+            return [start]
+        layout = _state_layout(self.fwd_astar.grid.size)
+        block = shared_memory.SharedMemory(create=True, size=layout_size(layout))
+        try:
+            state = array_views(block.buf, layout)
+            state["g"][...] = INF
+            state["parent"][...] = -1
+            # no side stops before the other one published a key
+            state["top"][...] = -INF
+            state["mu"][...] = INF
+            del state
+            self._run_workers(block.name)
+            return self._join_sides(block.buf)
+        finally:
+            block.close()
+            block.unlink()
+
+    def _run_workers(self, state_name: str) -> None:
+        with SharedGrid(self.fwd_astar.grid) as grid:
+            workers = []
+            for side, astar in ((FORWARD, self.fwd_astar), (BACKWARD, self.bwd_astar)):
+                args = (side, grid.handle, state_name, astar.start.pos, astar.target.pos)
+                args += (astar.delta, astar.heuristic, astar.costs)
+                workers.append(multiprocessing.Process(target=_run_frontier, args=args))
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        if any(worker.exitcode for worker in workers):
+            raise RuntimeError("a bidirectional search worker failed")
+
+    def _join_sides(self, buffer) -> list[TPosition]:
+        """Join the two sides at the cell with the lowest sum of g-values."""
+        state = array_views(buffer, _state_layout(self.fwd_astar.grid.size))
+        self.expanded = tuple(int(count) for count in state["expanded"][:, 0])
+        # the meetings the workers found decide when to stop, the best one is looked up here
+        total = state["g"][FORWARD] + state["g"][BACKWARD]
+        meeting = int(np.argmin(total))
+        if total[meeting] == INF:
+            return [self.fwd_astar.start.pos]
+        columns = self.fwd_astar.grid.shape[1]
+        path = []
+        for side in (FORWARD, BACKWARD):
+            parent = state["parent"][side]
+            half = []
+            index = meeting
+            while index >= 0:
+                half.append(divmod(index, columns))
+                index = int(parent[index])
+            path = half[::-1] if side == FORWARD else path + half[1:]
+        return path
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    grid = (rng.random((1000, 1000)) < 0.25).astype(np.uint8)
+    grid[0, 0] = grid[999, 999] = 0
+
+    start_time = time.time()
+    path = BidirectionalAStar((0, 0), (999, 999), grid=grid).search()
+    print(f"BidirectionalAStar: {len(path)} cells in {time.time() - start_time:f} seconds")
+
+    start_time = time.time()
+    path = ParallelBidirectionalAStar((0, 0), (999, 999), grid=grid).search()
+    print(f"ParallelBidirectionalAStar: {len(path)} cells in {time.time() - start_time:f} seconds")
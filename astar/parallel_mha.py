@@ -0,0 +1,341 @@
+"""Multi-heuristic A* with every inadmissible queue expanded by its own worker process.
+
+The parent process runs the anchor search of MultiHeuristicAStar, and each inadmissible
+heuristic gets a worker with its own open list, in the manner of PA*SE. All of them share one
+shared memory block holding the g-value and parent of every cell, the anchor and inadmissible
+closed sets, and the anchor's smallest key. A worker expands the top of its queue while its key
+stays within w2 times that key, exactly the rule the sequential search applies in turn, so more
+heuristics add workers instead of rounds.
+
+g-values and parents are only changed under one lock, which keeps every cell's g larger than its
+parent's, so parents never form a cycle. Every expansion sends the cells it improved to the other
+searches, which queue them with their own keys. Those messages only save work: the anchor queues
+every neighbour of a cell it expands that it has not closed, with the g-value found in shared
+memory, whoever improved it. Hence, as in MHA*, the smallest anchor key bounds w1 times the
+optimal cost, and the anchor stops once the goal's g-value is within w2 times that key. When the
+anchor queue runs empty the workers are stopped and the anchor finishes alone, so a path is found
+whenever one exists.
+
+Each search starts a process per inadmissible heuristic, about 25 ms before the first
+expansion, and every expansion pickles the cells it improved for the other searches. On one core
+that makes it several times slower than MultiHeuristicAStar, so it needs a free core per
+heuristic, and heuristics costly enough that evaluating them in parallel outweighs the messages.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from astar.multi_heuristic_astar import (
+    MultiHeuristicAStar,
+    PriorityQueue,
+    SearchResult,
+    heuristic_2,
+)
+from astar.shared_grid import GridHandle, Layout, SharedGrid, array_views, attach, layout_size
+
+TPos = tuple[int, int]
+
+INF = float("inf")
+
+OFFSETS = ((-1, 0), (1, 0), (0, 1), (0, -1))
+
+
+def _state_layout(cells: int, workers: int) -> Layout:
+    """Arrays shared by the anchor and the workers."""
+    return (
+        ("g", np.float64, (cells,)),
+        ("parent", np.int64, (cells,)),
+        ("anchor_key", np.float64, (1,)),
+        ("stop", np.int64, (1,)),
+        ("expanded", np.int64, (workers,)),
+        ("closed_anchor", np.uint8, (cells,)),
+        ("closed_inad", np.uint8, (cells,)),
+    )
+
+
+class _Frontier:
+    """One open list of a parallel search, scoring cells with one of the heuristics."""
+
+    def __init__(self, blocked: np.ndarray, state, goal: TPos, heuristic, w1: float) -> None:
+        self.rows, self.columns = blocked.shape
+        self._blocked = blocked.data
+        self.g = state["g"]
+        self.parent = state["parent"]
+        self.goal = goal
+        self.heuristic = heuristic
+        self.w1 = w1
+        # inadmissible expansions so far, heuristic_2 is divided by it
+        self.t = 1
+        self.open_list = PriorityQueue()
+
+    def keys(self, positions: list[TPos], g_values) -> list[float]:
+        if self.heuristic is heuristic_2:
+            h = heuristic_2(np.array(positions), self.goal, self.t)
+        else:
+            h = self.heuristic(np.array(positions), self.goal)
+        return (np.asarray(g_values) + self.w1 * h).tolist()
+
+    def queue(self, positions: list[TPos], keys: list[float]) -> None:
+        """Put positions on the open list, or lower their keys, where that improves them."""
+        open_list = self.open_list
+        for position, key in zip(positions, keys):
+            entry = open_list.index.get(position)
+            if entry is None or key < open_list.elements[entry][0]:
+                open_list.put(position, key)
+
+    def neighbours(self, s: TPos) -> list[TPos]:
+        rows, columns = self.rows, self.columns
+        cells = []
+        for dy, dx in OFFSETS:
+            p = (s[0] + dy, s[1] + dx)
+            if 0 <= p[0] < rows and 0 <= p[1] < columns and not self._blocked[p]:
+                cells.append(p)
+        return cells
+
+    def relax(self, s: TPos, neighbours: list[TPos], lock) -> list[tuple[int, float]]:
+        """Lower the g-values of the neighbours reached through s, return the improved cells."""
+        g, parent, columns = self.g, self.parent, self.columns
+        index = s[0] * columns + s[1]
+        improved = []
+        with lock:
+            g_s = g[index] + 1
+            for p in neighbours:
+                cell = p[0] * columns + p[1]
+                if g_s < g[cell]:
+                    g[cell] = g_s
+                    parent[cell] = index
+                    improved.append((cell, float(g_s)))
+        return improved
+
+
+def _receive(inbox, block: bool) -> list[tuple[int, float]]:
+    """All improved cells waiting in inbox, waiting briefly for the first one if block."""
+    cells = []
+    try:
+        cells.extend(inbox.get(timeout=0.01) if block else inbox.get_nowait())
+        while True:
+            cells.extend(inbox.get_nowait())
+    except queue.Empty:
+        pass
+    return cells
+
+
+def _run_inadmissible(
+    i: int,
+    grid: GridHandle,
+    state_name: str,
+    lock,
+    inboxes: list,
+    start: TPos,
+    goal: TPos,
+    heuristics: tuple,
+    w1: float,
+    w2: float,
+) -> None:
+    """Worker process expanding the queue of inadmissible heuristic i."""
+    # nothing sent is needed once the search stops, so exiting never waits on a reader
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+    blocked = attach(grid)
+    block = shared_memory.SharedMemory(name=state_name)
+    try:
+        state = array_views(block.buf, _state_layout(blocked.size, len(heuristics)))
+        frontier = _Frontier(blocked, state, goal, heuristics[i], w1)
+        anchor = _Frontier(blocked, state, goal, heuristics[0], w1)
+        _search_inadmissible(i, frontier, anchor, state, lock, inboxes, start, w2)
+        del state, frontier, anchor
+    finally:
+        block.close()
+
+
+def _search_inadmissible(
+    i: int,
+    frontier: _Frontier,
+    anchor: _Frontier,
+    state: dict[str, np.ndarray],
+    lock,
+    inboxes: list,
+    start: TPos,
+    w2: float,
+) -> None:
+    columns, open_list = frontier.columns, frontier.open_list
+    closed_anchor, closed_inad = state["closed_anchor"], state["closed_inad"]
+    anchor_key, stop = state["anchor_key"], state["stop"]
+    frontier.queue([start], frontier.keys([start], [0.0]))
+    expanded = 0
+    while not stop[0]:
+        idle = open_list.empty() or open_list.minkey() > w2 * anchor_key[0]
+        received = _receive(inboxes[i], block=idle)
+        received = [(cell, g) for cell, g in received if not closed_inad[cell]]
+        if received:
+            positions = [divmod(cell, columns) for cell, _ in received]
+            g_values = [g for _, g in received]
+            frontier.queue(positions, frontier.keys(positions, g_values))
+        if open_list.empty() or open_list.minkey() > w2 * anchor_key[0]:
+            continue
+        _, s = open_list.get()
+        index = s[0] * columns + s[1]
+        if closed_inad[index] or closed_anchor[index]:
+            continue
+        closed_inad[index] = 1
+        frontier.t += 1
+        improved = frontier.relax(s, frontier.neighbours(s), lock)
+        expanded += 1
+        if not improved:
+            continue
+        for j, inbox in enumerate(inboxes):
+            if j != i:
+                inbox.put(improved)
+        # like MultiHeuristicAStar, only cells within w2 of their anchor key are queued
+        positions = [divmod(cell, columns) for cell, _ in improved]
+        g_values = [g for _, g in improved]
+        anchor_keys = anchor.keys(positions, g_values)
+        keys = frontier.keys(positions, g_values)
+        within = [n for n, key in enumerate(keys) if key <= w2 * anchor_keys[n]]
+        frontier.queue([positions[n] for n in within], [keys[n] for n in within])
+    state["expanded"][i] = expanded
+
+
+class ParallelMultiHeuristicAStar(MultiHeuristicAStar):
+    """
+    MultiHeuristicAStar with the anchor search in the calling process and one worker process per
+    inadmissible heuristic. The found path still costs at most w1 * w2 times the optimum, which
+    one it is depends on how the workers are scheduled. The heuristics are sent to the workers,
+    so they have to be picklable, and hooks are not supported.
+
+    >>> grid = np.zeros((5, 5), dtype=np.uint8)
+    >>> grid[1:5, 2] = 1
+    >>> result = ParallelMultiHeuristicAStar(grid, w1=1.5, w2=2).search((4, 0), (4, 4))
+    >>> result.path[0], result.path[-1], 12 <= result.cost <= 1.5 * 2 * 12
+    ((4, 0), (4, 4), True)
+    >>> grid[0, 2] = 1
+    >>> ParallelMultiHeuristicAStar(grid).search((4, 0), (4, 4)).path
+    [(4, 0)]
+    """
+
+    def search(self, start: TPos, goal: TPos, hooks=None) -> SearchResult:
+        """Search a path from start to goal, only start is returned without one."""
+        if hooks is not None:
+            raise ValueError("ParallelMultiHeuristicAStar does not support hooks")
+        if start == goal:
+            return SearchResult([start], 0.0, 0, 0)
+        cells, workers = self.blocked.size, len(self.heuristics)
+        layout = _state_layout(cells, workers)
+        block = shared_memory.SharedMemory(create=True, size=layout_size(layout))
+        try:
+            state = array_views(block.buf, layout)
+            state["g"][...] = INF
+            state["parent"][...] = -1
+            state["closed_anchor"][...] = 0
+            state["closed_inad"][...] = 0
+            state["stop"][...] = 0
+            state["expanded"][...] = 0
+            state["g"][start[0] * self.blocked.shape[1] + start[1]] = 0
+            result = self._run(start, goal, state, block.name)
+            del state
+            return result
+        finally:
+            block.close()
+            block.unlink()
+
+    def _run(self, start: TPos, goal: TPos, state, state_name: str) -> SearchResult:
+        lock = multiprocessing.Lock()
+        # inboxes[0] is the anchor's, inboxes[i] the one of the worker of heuristic i
+        inboxes = [multiprocessing.Queue() for _ in self.heuristics]
+        anchor = _Frontier(self.blocked, state, goal, self.heuristics[0], self.w1)
+        anchor.queue([start], anchor.keys([start], [0.0]))
+        state["anchor_key"][0] = anchor.open_list.minkey()
+        with SharedGrid(self.blocked) as grid:
+            workers = []
+            for i in range(1, len(self.heuristics)):
+                args = (i, grid.handle, state_name, lock, inboxes, start, goal)
+                args += (self.heuristics, self.w1, self.w2)
+                workers.append(multiprocessing.Process(target=_run_inadmissible, args=args))
+            for worker in workers:
+                worker.start()
+            try:
+                expanded = self._search_anchor(anchor, state, lock, inboxes, workers, goal)
+            finally:
+                state["stop"][0] = 1
+                for worker in workers:
+                    worker.join()
+                for inbox in inboxes:
+                    inbox.cancel_join_thread()
+                    inbox.close()
+        if any(worker.exitcode for worker in workers):
+            raise RuntimeError("a multi-heuristic search worker failed")
+        inadmissible = int(state["expanded"][1:].sum())
+        columns = self.blocked.shape[1]
+        index = goal[0] * columns + goal[1]
+        if state["g"][index] == INF:
+            return SearchResult([start], INF, expanded, inadmissible)
+        path = []
+        while index >= 0:
+            path.append(divmod(index, columns))
+            index = int(state["parent"][index])
+        path.reverse()
+        return SearchResult(path, float(len(path) - 1), expanded, inadmissible)
+
+    def _search_anchor(self, anchor: _Frontier, state, lock, inboxes, workers, goal) -> int:
+        """Expand the anchor queue until the goal is within the bound, return the expansions."""
+        columns, open_list, w2 = anchor.columns, anchor.open_list, self.w2
+        g, closed_anchor, anchor_key = state["g"], state["closed_anchor"], state["anchor_key"]
+        goal_index = goal[0] * columns + goal[1]
+        alone = False
+        expanded = 0
+        while True:
+            received = _receive(inboxes[0], block=False)
+            # a cell improved again since the message was sent has a lower g-value by now
+            received = [(cell, min(g_cell, g[cell])) for cell, g_cell in received]
+            received = [(cell, g_cell) for cell, g_cell in received if not closed_anchor[cell]]
+            if received:
+                positions = [divmod(cell, columns) for cell, _ in received]
+                anchor.queue(positions, anchor.keys(positions, [g_cell for _, g_cell in received]))
+            minkey = open_list.minkey()
+            anchor_key[0] = minkey
+            if g[goal_index] < INF and g[goal_index] <= w2 * minkey:
+                return expanded
+            if minkey == INF:
+                if alone:
+                    return expanded
+                # messages may still be on their way, the anchor finishes on its own
+                state["stop"][0] = 1
+                for worker in workers:
+                    worker.join()
+                alone = True
+                continue
+            _, s = open_list.get()
+            index = s[0] * columns + s[1]
+            closed_anchor[index] = 1
+            neighbours = anchor.neighbours(s)
+            improved = anchor.relax(s, neighbours, lock)
+            expanded += 1
+            if improved and not alone:
+                for inbox in inboxes[1:]:
+                    inbox.put(improved)
+            neighbours = [p for p in neighbours if not closed_anchor[p[0] * columns + p[1]]]
+            if neighbours:
+                g_values = [g[p[0] * columns + p[1]] for p in neighbours]
+                anchor.queue(neighbours, anchor.keys(neighbours, g_values))
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    grid = (rng.random((256, 256)) < 0.25).astype(np.uint8)
+    grid[0, 0] = grid[255, 255] = 0
+
+    for solver in (MultiHeuristicAStar, ParallelMultiHeuristicAStar):
+        start_time = time.time()
+        result = solver(grid, w1=1.5, w2=2).search((0, 0), (255, 255))
+        print(
+            f"{solver.__name__}: cost {result.cost}, {result.anchor_expansions} anchor and "
+            f"{result.inadmissible_expansions} inadmissible expansions in "
+            f"{time.time() - start_time:f} seconds"
+        )
@@ -0,0 +1,121 @@
+"""Least recently used cache of search results that survives local grid changes.
+
+Entries are keyed on (grid version, start, goal, heuristic). A grid version identifies one state
+of one grid, it changes whenever cells are updated. The cache then keeps every path that does not
+cross the changed cells, moving it to the new version, as long as cells only became blocked:
+adding obstacles can not make another path shorter. Freeing cells can shorten any path, so in
+that case every entry of the old version is dropped.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+
+TPosition = tuple[int, int]
+TKey = tuple[Hashable, TPosition, TPosition, Hashable]
+
+
+class PathCache:
+    """
+    >>> cache = PathCache(maxsize=2)
+    >>> cache.store(0, (0, 0), (0, 2), [(0, 0), (0, 1), (0, 2)])
+    >>> cache.store(0, (1, 0), (1, 2), [(1, 0), (1, 1), (1, 2)])
+    >>> cache.lookup(0, (0, 0), (0, 2))
+    [(0, 0), (0, 1), (0, 2)]
+    >>> cache.cells_changed(0, 1, [(1, 1)])
+    >>> cache.lookup(1, (1, 0), (1, 2)) is None
+    True
+    >>> cache.lookup(1, (0, 0), (0, 2))
+    [(0, 0), (0, 1), (0, 2)]
+    >>> cache.hits, cache.misses, len(cache)
+    (2, 1, 1)
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._paths: OrderedDict[TKey, tuple[TPosition, ...]] = OrderedDict()
+        self._by_version: dict[Hashable, set[TKey]] = {}
+        self._by_cell: dict[tuple[Hashable, TPosition], set[TKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def lookup(
+        self, version: Hashable, start: TPosition, goal: TPosition, heuristic: Hashable = None
+    ) -> list[TPosition] | None:
+        """Return the cached path or None, heuristic identifies the search that produced it."""
+        key = (version, start, goal, heuristic)
+        path = self._paths.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._paths.move_to_end(key)
+        return list(path)
+
+    def store(
+        self,
+        version: Hashable,
+        start: TPosition,
+        goal: TPosition,
+        path: list[TPosition],
+        heuristic: Hashable = None,
+    ) -> None:
+        key = (version, start, goal, heuristic)
+        if key in self._paths:
+            self._remove(key)
+        self._add(key, tuple(path))
+        while len(self._paths) > self.maxsize:
+            self._remove(next(iter(self._paths)))
+
+    def cells_changed(
+        self,
+        old_version: Hashable,
+        new_version: Hashable,
+        cells: Iterable[TPosition],
+        blocked: bool = True,
+    ) -> None:
+        """Carry the entries of old_version that are still valid over to new_version.
+
+        blocked tells whether the cells only became obstacles or more expensive.
+        """
+        keys = self._by_version.get(old_version, set())
+        if blocked:
+            stale = set()
+            for cell in cells:
+                stale |= self._by_cell.get((old_version, cell), set())
+        else:
+            stale = set(keys)
+        # Carried over entries keep their relative order but become the most recently used.
+        for key in [key for key in self._paths if key in keys]:
+            path = self._paths[key]
+            self._remove(key)
+            if key not in stale:
+                self._add((new_version,) + key[1:], path)
+
+    def clear(self) -> None:
+        self._paths.clear()
+        self._by_version.clear()
+        self._by_cell.clear()
+
+    def _add(self, key: TKey, path: tuple[TPosition, ...]) -> None:
+        self._paths[key] = path
+        version = key[0]
+        self._by_version.setdefault(version, set()).add(key)
+        for cell in path:
+            self._by_cell.setdefault((version, cell), set()).add(key)
+
+    def _remove(self, key: TKey) -> None:
+        path = self._paths.pop(key)
+        version = key[0]
+        self._by_version[version].discard(key)
+        if not self._by_version[version]:
+            del self._by_version[version]
+        for cell in path:
+            keys = self._by_cell[(version, cell)]
+            keys.discard(key)
+            if not keys:
+                del self._by_cell[(version, cell)]
@@ -0,0 +1,177 @@
+"""Grids that worker processes can read without receiving a copy.
+
+A SharedGrid either copies a grid once into a multiprocessing.shared_memory block or wraps an
+existing .npy file that is memory-mapped. Its handle is a tiny picklable description of where the
+data lives; workers turn it back into a read-only NumPy array with attach() and unmap it with
+detach(), so the map costs its size once instead of once per process. A BitGrid is shared as
+its packed bits and attached as a BitGrid again.
+
+The parallel searchers also keep their search state in a shared memory block, array_views lays
+out the named arrays of such a block one after the other.
+"""
+
+from __future__ import annotations
+
+import os
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+from astar.bitgrid import BitGrid
+
+
+class GridHandle(NamedTuple):
+    name: str | None
+    shape: tuple[int, ...]
+    dtype: str
+    path: str | None = None
+    # columns of a shared BitGrid, whose shape is then the one of its packed bits
+    bit_columns: int | None = None
+
+
+# (name, dtype, shape) of every array of a shared memory block, in the order they are laid out.
+Layout = tuple[tuple[str, type, tuple[int, ...]], ...]
+
+
+def _offsets(layout: Layout) -> tuple[list[int], int]:
+    """Offset of every array of layout, each aligned for its dtype, and the total size."""
+    offsets = []
+    offset = 0
+    for _, dtype, shape in layout:
+        dtype = np.dtype(dtype)
+        offset += -offset % dtype.alignment
+        offsets.append(offset)
+        offset += dtype.itemsize * int(np.prod(shape))
+    return offsets, offset
+
+
+def layout_size(layout: Layout) -> int:
+    """Bytes of shared memory the arrays of layout take."""
+    return _offsets(layout)[1]
+
+
+def array_views(buffer, layout: Layout) -> dict[str, np.ndarray]:
+    """The arrays of layout laid out in buffer, by name.
+
+    >>> layout = (("flags", np.uint8, (3,)), ("g", np.float64, (2, 2)))
+    >>> layout_size(layout)
+    40
+    >>> views = array_views(bytearray(layout_size(layout)), layout)
+    >>> views["g"][...] = 1.5
+    >>> views["flags"].tolist(), views["g"].tolist()
+    ([0, 0, 0], [[1.5, 1.5], [1.5, 1.5]])
+    """
+    offsets, _ = _offsets(layout)
+    return {
+        name: np.ndarray(shape, dtype, buffer=buffer, offset=offset)
+        for (name, dtype, shape), offset in zip(layout, offsets)
+    }
+
+
+# Shared memory blocks attached in this process, kept alive until detach() releases them.
+_attached: dict[str, shared_memory.SharedMemory] = {}
+
+
+def attach(handle: GridHandle) -> np.ndarray | BitGrid:
+    """Return a read-only array viewing the grid described by handle, without copying it.
+
+    A shared BitGrid is returned as a BitGrid viewing the shared bits. The block stays mapped
+    in this process until detach(handle).
+    """
+    if handle.path is not None:
+        return np.load(handle.path, mmap_mode="r")
+
+    assert handle.name is not None
+    if handle.name not in _attached:
+        _attached[handle.name] = shared_memory.SharedMemory(name=handle.name)
+    grid: np.ndarray = np.ndarray(
+        handle.shape, dtype=handle.dtype, buffer=_attached[handle.name].buf
+    )
+    grid.flags.writeable = False
+    if handle.bit_columns is not None:
+        return BitGrid((handle.shape[0], handle.bit_columns), bits=grid)
+    return grid
+
+
+def detach(handle: GridHandle) -> None:
+    """Unmap the block attach() mapped for handle in this process, if any.
+
+    Every array attach() returned for handle must be gone by then, a block still viewed by an
+    array can not be unmapped and raises BufferError.
+
+    >>> grid = SharedGrid([[0, 1], [0, 0]])
+    >>> view = attach(grid.handle)
+    >>> del view
+    >>> detach(grid.handle)
+    >>> grid.handle.name in _attached
+    False
+    >>> grid.close()
+    """
+    if handle.name is None:
+        return
+    block = _attached.get(handle.name)
+    if block is not None:
+        block.close()
+        del _attached[handle.name]
+
+
+class SharedGrid:
+    """
+    A grid copied into shared memory, or a memory-mapped .npy file, that workers attach to.
+
+    >>> grid = SharedGrid([[0, 1], [0, 0]])
+    >>> view = attach(grid.handle)
+    >>> view.tolist(), view.flags.writeable
+    ([[0, 1], [0, 0]], False)
+    >>> del view
+    >>> grid.close()
+    >>> packed = SharedGrid(BitGrid.from_array([[0, 1], [0, 0]]))
+    >>> view = attach(packed.handle)
+    >>> type(view).__name__, view[0, 1], view.bits.flags.writeable
+    ('BitGrid', True, False)
+    >>> del view
+    >>> packed.close()
+    """
+
+    def __init__(self, grid) -> None:
+        bit_columns = None
+        if isinstance(grid, BitGrid):
+            # the packed bits are shared, a BitGrid is never unpacked
+            grid, bit_columns = grid.bits, grid.shape[1]
+        grid = np.asarray(grid)
+        self._shm: shared_memory.SharedMemory | None = shared_memory.SharedMemory(
+            create=True, size=max(grid.nbytes, 1)
+        )
+        self.array: np.ndarray | None = np.ndarray(grid.shape, grid.dtype, buffer=self._shm.buf)
+        self.array[...] = grid
+        self.handle = GridHandle(self._shm.name, grid.shape, grid.dtype.str, None, bit_columns)
+
+    @classmethod
+    def from_npy(cls, path: str | os.PathLike) -> SharedGrid:
+        """Share a grid saved with np.save, every process memory-maps the same file."""
+        shared = cls.__new__(cls)
+        shared._shm = None
+        shared.array = np.load(path, mmap_mode="r")
+        shared.handle = GridHandle(
+            None, shared.array.shape, shared.array.dtype.str, os.fspath(path)
+        )
+        return shared
+
+    def close(self) -> None:
+        """Release the grid, the shared memory block is destroyed and self.array is dropped.
+
+        The block is also detached if this process attached it.
+        """
+        self.array = None
+        if self._shm is not None:
+            detach(self.handle)
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> SharedGrid:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -4,6 +4,9 @@ https://en.wikipedia.org/wiki/Best-first_search#Greedy_BFS
 
 from __future__ import annotations
 
+import heapq
+from itertools import count
+
 Path = list[tuple[int, int]]
 
 # 0's are free path whereas 1's are obstacles
@@ -100,43 +103,106 @@ class GreedyBestFirst:
     >>> gbf.search()  # doctest: +NORMALIZE_WHITESPACE
     [(0, 0), (1, 0), (2, 0), (2, 1), (3, 1), (4, 1), (4, 2), (4, 3),
      (4, 4)]
+
+    A beam width caps the frontier, the search may then miss a path that exists:
+
+    >>> from astar.instrumentation import SearchStats
+    >>> stats = SearchStats()
+    >>> GreedyBestFirst(grid, (0, 0), (4, 4), hooks=stats, beam_width=2).search()
+    [(0, 0), (1, 0), (2, 0), (2, 1), (3, 1), (4, 1), (4, 2), (4, 3), (4, 4)]
+    >>> stats.open_peak
+    2
+    >>> GreedyBestFirst(grid, (0, 0), (0, 4), beam_width=1).search()
+    [(0, 0)]
     """
 
-    def __init__(self, grid: list[list[int]], start: tuple[int, int], goal: tuple[int, int]):
+    def __init__(
+        self,
+        grid: list[list[int]],
+        start: tuple[int, int],
+        goal: tuple[int, int],
+        hooks=None,
+        beam_width: int | None = None,
+    ):
         self.grid = grid
         self.start = Node(start[1], start[0], goal[1], goal[0], 0, None)
         self.target = Node(goal[1], goal[0], goal[1], goal[0], 99999, None)
 
-        self.open_nodes = [self.start]
-        self.closed_nodes: list[Node] = []
+        # Heap of (heuristic, counter, node), ties go to the node pushed first
+        self._counter = count()
+        self.open_nodes = [(self.start.f_cost, next(self._counter), self.start)]
+        # Positions ever pushed, a position is pushed at most once
+        self.visited = {self.start.pos}
+        # With a beam width the frontier never holds more than beam_width nodes, every push
+        # beyond that drops the worst one. This bounds the open list at the price of
+        # completeness, visited still grows with every position pushed.
+        if beam_width is not None and beam_width < 1:
+            raise ValueError("beam_width must be at least 1")
+        self.beam_width = beam_width
 
         self.reached = False
+        # Optional SearchHooks, see astar.instrumentation.
+        self.hooks = hooks
 
     def search(self) -> Path | None:
         """Search for the path, if a path is not found, only the starting position is returned."""
-        while self.open_nodes:
-            # Open Nodes are sorted using __lt__
-            self.open_nodes.sort()
-            current_node = self.open_nodes.pop(0)
+        hooks = self.hooks
+        open_nodes, visited = self.open_nodes, self.visited
+        if hooks is not None:
+            hooks.on_phase("search")
+            hooks.on_push(self.start.pos, len(open_nodes))
+        while open_nodes:
+            current_node = heapq.heappop(open_nodes)[2]
 
             if current_node.pos == self.target.pos:
                 self.reached = True
-                return self.retrace_path(current_node)
-
-            self.closed_nodes.append(current_node)
+                if hooks is None:
+                    return self.retrace_path(current_node)
+                hooks.on_goal(current_node.pos)
+                hooks.on_phase("retrace")
+                path = self.retrace_path(current_node)
+                hooks.on_finish(path)
+                return path
+
+            if hooks is not None:
+                hooks.on_expand(current_node.pos)
             successors = self.get_successors(current_node)
 
             for child_node in successors:
-                if child_node in self.closed_nodes:
+                if hooks is not None:
+                    hooks.on_heuristic(child_node.pos)
+                if child_node.pos in visited:
                     continue
-
-                if child_node not in self.open_nodes:
-                    self.open_nodes.append(child_node)
+                visited.add(child_node.pos)
+                heapq.heappush(open_nodes, (child_node.f_cost, next(self._counter), child_node))
+                if self.beam_width is not None and len(open_nodes) > self.beam_width:
+                    self._drop_worst()
+                if hooks is not None:
+                    hooks.on_push(child_node.pos, len(open_nodes))
 
         if not self.reached:
+            if hooks is not None:
+                hooks.on_finish([self.start.pos])
             return [self.start.pos]
         return None
 
+    def _drop_worst(self) -> None:
+        """Remove the worst node from the open list, keeping the rest a heap."""
+        open_nodes = self.open_nodes
+        # the largest entry of a heap is one of its leaves
+        index = max(range(len(open_nodes) // 2, len(open_nodes)), key=open_nodes.__getitem__)
+        last = open_nodes.pop()
+        if index == len(open_nodes):
+            return
+        # the last leaf takes its place and moves up past the parents it is smaller than
+        while index > 0:
+            parent = (index - 1) // 2
+            if not last < open_nodes[parent]:
+                break
+            open_nodes[index] = open_nodes[parent]
+            index = parent
+        open_nodes[index] = last
+
     def get_successors(self, parent: Node) -> list[Node]:
         """Returns a list of successors (both in the grid and free spaces)"""
         return [